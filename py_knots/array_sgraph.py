@@ -0,0 +1,269 @@
+import numpy as np
+from typing import List, Tuple, Dict
+from dataclasses import dataclass
+from sgraph import *
+
+"""
+----- An array-backed engine for building spline graphs.
+----- Vertices and edges are plain integer ids, and the edge data is kept
+----- in flat NumPy columns. Use to_sgraph() to get an SGraph for the
+----- homology basis and the generalized Seifert matrices.
+"""
+
+
+# Class for spline graphs stored as flat integer arrays.
+# Vertex ids are the nums of the SVertices, edge ids are given
+# in the order that edges are added to the graph.
+@dataclass
+class ArraySGraph:
+    vert_col: np.ndarray
+    colors: int
+    col_signs: List[int]
+    size: int = 0
+
+    def __post_init__(self):
+        self.vert_col = np.asarray(self.vert_col, dtype=np.int64)
+        self.initial = np.zeros(16, dtype=np.int64)
+        self.terminal = np.zeros(16, dtype=np.int64)
+        self.typ = np.zeros(16, dtype=np.int64)
+        self.col = np.zeros(16, dtype=np.int64)
+        self.num = np.zeros(16, dtype=np.int64)
+        self.alive = np.zeros(16, dtype=bool)
+
+        # Number of live edges between each pair of vertices which has edges
+        self.pair_count = {}
+        self.adjacency_cache = {}
+
+    # Number of vertices
+    @property
+    def vert_count(self) -> int:
+        return len(self.vert_col)
+
+    # Ids of the edges still in the graph, in the order of the graph
+    @property
+    def edge_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[:self.size])
+
+    # Doubles the capacity of the edge columns
+    def grow(self):
+        for name in ["initial", "terminal", "typ", "col", "num", "alive"]:
+            old = getattr(self, name)
+            new = np.zeros(2*len(old), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    """
+
+    ------- Tools for making the final spline graph ------
+
+    """
+
+    # Add new edges (by vertex ids) to the front of the graph, in order.
+    # The columns are written once for all of them, and num counts the
+    # earlier edges between the same pair, found by a stable sort.
+    # Returns the ids of the new edges.
+    def add_edges_ids(self, initial: np.ndarray, terminal: np.ndarray,
+            typ: np.ndarray, col: np.ndarray) -> np.ndarray:
+        initial = np.asarray(initial, dtype=np.int64)
+        terminal = np.asarray(terminal, dtype=np.int64)
+        k = len(initial)
+        while(self.size + k > len(self.alive)):
+            self.grow()
+
+        keys = initial*self.vert_count + terminal
+        perm = np.argsort(keys, kind='stable')
+        first = np.ones(k, dtype=bool)
+        first[1:] = keys[perm][1:] != keys[perm][:-1]
+        start = np.flatnonzero(first)
+        group = np.cumsum(first) - 1
+        counts = np.diff(np.append(start, k))
+        uniq = keys[perm][start].tolist()
+        base = np.array([self.pair_count.get(key, 0) for key in uniq],
+            dtype=np.int64)
+        for key, b, c in zip(uniq, base.tolist(), counts.tolist()):
+            self.pair_count[key] = b + c
+
+        new = np.arange(self.size, self.size + k)
+        self.initial[new] = initial
+        self.terminal[new] = terminal
+        self.typ[new] = typ
+        self.col[new] = col
+        self.num[new[perm]] = np.arange(k) - start[group] + base[group]
+        self.alive[new] = True
+
+        self.size += k
+        self.adjacency_cache = {}
+        return new
+
+    # Add a new edge (by vertex ids) to the front of the graph.
+    def add_edge_ids(self, init: int, term: int, typ: int, col: int) -> int:
+        return int(self.add_edges_ids([init], [term], [typ], [col])[0])
+
+    # Deletes an edge from the graph
+    def delete_edge(self, e: int):
+        key = self.initial[e]*self.vert_count + self.terminal[e]
+        self.alive[e] = False
+        self.pair_count[key] -= 1
+        if(self.pair_count[key] == 0):
+            del self.pair_count[key]
+        self.adjacency_cache = {}
+
+    # CSR adjacency of vertices: the edges at vertex v are
+    # indices[indptr[v]:indptr[v+1]], in the order of the graph.
+    def vertex_adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        if("vertex" not in self.adjacency_cache):
+            ids = self.edge_ids
+            ends = np.concatenate([self.initial[ids], self.terminal[ids]])
+            both = np.concatenate([ids, ids])
+            rank = np.concatenate([np.arange(len(ids))]*2)
+            perm = np.lexsort((rank, ends))
+            indptr = np.zeros(self.vert_count+1, dtype=np.int64)
+            np.cumsum(np.bincount(ends, minlength=self.vert_count),
+                out=indptr[1:])
+            self.adjacency_cache["vertex"] = (indptr, both[perm])
+        return self.adjacency_cache["vertex"]
+
+    # CSR adjacency of pairs of vertices. Only pairs with edges are stored.
+    # keys[k] = init*vert_count + term, and the edges between them are
+    # indices[indptr[k]:indptr[k+1]], in the order of the graph.
+    def pair_adjacency(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if("pair" not in self.adjacency_cache):
+            ids = self.edge_ids
+            all_keys = self.initial[ids]*self.vert_count + self.terminal[ids]
+            perm = np.argsort(all_keys, kind='stable')
+            keys, counts = np.unique(all_keys[perm], return_counts=True)
+            indptr = np.zeros(len(keys)+1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            self.adjacency_cache["pair"] = (keys, indptr, ids[perm])
+        return self.adjacency_cache["pair"]
+
+    # Edges between two vertices, in the order of the graph.
+    def pair_edges(self, init: int, term: int) -> np.ndarray:
+        keys, indptr, indices = self.pair_adjacency()
+        k = np.searchsorted(keys, init*self.vert_count + term)
+        if((k < len(keys)) and (keys[k] == init*self.vert_count + term)):
+            return indices[indptr[k]:indptr[k+1]]
+        return indices[:0]
+
+    # Cleans up redundant pairs of edges.
+    # Deletes the same edges as SGraph.clean_graph.
+    def clean_graph(self):
+        ids = self.edge_ids
+        ind = np.zeros(self.size, dtype=np.int64)
+        ind[ids] = np.arange(len(ids))
+
+        v_indptr, v_indices = self.vertex_adjacency()
+        keys, p_indptr, p_indices = self.pair_adjacency()
+        v_indices = ind[v_indices].tolist()
+        p_indices = ind[p_indices].tolist()
+
+        keep = cancel_redundant_pairs(self.typ[ids].tolist(),
+            [v_indices[v_indptr[v]:v_indptr[v+1]]
+                for v in range(self.vert_count)],
+            [p_indices[p_indptr[k]:p_indptr[k+1]] for k in range(len(keys))])
+
+        for e, kept in zip(ids.tolist(), keep):
+            if(not kept):
+                self.delete_edge(e)
+
+    # List of the first vertices in each color.
+    def col_first_verts(self) -> List[int]:
+        return [int(np.flatnonzero(self.vert_col == c)[0])
+            for c in range(self.colors)]
+
+    # Makes sure each Seifert surface is connected
+    def colors_connected(self) -> None:
+        for v in range(self.vert_count-1):
+            if((self.vert_col[v] == self.vert_col[v+1]) and
+            ((v*self.vert_count + v+1) not in self.pair_count)):
+                self.add_edge_ids(v, v+1, 1, self.vert_col[v])
+                self.add_edge_ids(v, v+1, -1, self.vert_col[v])
+
+    # Checks if two colors are connected.
+    # The lower color should be the first input.
+    def check_connected(self, col1: int, col2: int) -> bool:
+        ids = self.edge_ids
+        return bool(np.any((self.vert_col[self.initial[ids]] == col1) &
+            (self.vert_col[self.terminal[ids]] == col2)))
+
+    # Makes sure the graph across colors is complete
+    def make_complete(self):
+        v_col = self.col_first_verts()
+        for color1 in range(len(v_col)):
+            for color2 in range(color1+1, len(v_col)):
+                if(not self.check_connected(color1, color2)):
+                    self.add_edge_ids(v_col[color1], v_col[color2], 2, color1)
+                    self.add_edge_ids(v_col[color1], v_col[color2], -2,
+                        color1)
+
+    # Finds the connected component of a set of colors
+    def find_conn_comp(self, conn_comp: Set[int]) -> Set[int]:
+        ids = self.edge_ids
+        col_pairs = set(zip(self.vert_col[self.initial[ids]].tolist(),
+            self.vert_col[self.terminal[ids]].tolist()))
+
+        queue = list(conn_comp)
+        while(queue):
+            col = queue.pop()
+            for (c1, c2) in col_pairs:
+                for (a, b) in [(c1, c2), (c2, c1)]:
+                    if((a == col) and (b not in conn_comp)):
+                        conn_comp.add(b)
+                        queue.append(b)
+
+        return conn_comp
+
+    # Makes sure the graph across colors is connected
+    def make_connected(self):
+        conn_comp = self.find_conn_comp({0})
+        want_conn = set(range(self.colors))
+        v_col = self.col_first_verts()
+
+        while(conn_comp != want_conn):
+
+            i = min({x for x in want_conn if x not in conn_comp})
+
+            self.add_edge_ids(v_col[0], v_col[i], 2, 0)
+            self.add_edge_ids(v_col[0], v_col[i], -2, 0)
+
+            conn_comp.update(self.find_conn_comp({i}))
+
+    # Converts the graph into an SGraph with the same edges, in the same
+    # order. vve and ve are cut out of the CSR adjacency, so only one key
+    # is hashed for each pair of vertices rather than for each edge, and
+    # the edge columns that the Seifert matrices read are handed over as
+    # they are.
+    def to_sgraph(self) -> SGraph:
+        n = self.vert_count
+        vert = [SVertex(v, c) for v, c in enumerate(self.vert_col.tolist())]
+
+        ids = self.edge_ids
+        initial = self.initial[ids]
+        terminal = self.terminal[ids]
+        edges = [SEdge(vert[init], vert[term], num, typ, col, eid)
+            for init, term, num, typ, col, eid in zip(initial.tolist(),
+                terminal.tolist(), self.num[ids].tolist(),
+                self.typ[ids].tolist(), self.col[ids].tolist(), ids.tolist())]
+
+        ind = np.zeros(self.size, dtype=np.int64)
+        ind[ids] = np.arange(len(ids))
+
+        keys, p_indptr, p_indices = self.pair_adjacency()
+        p_indices = ind[p_indices].tolist()
+        p_indptr = p_indptr.tolist()
+        vve = {}
+        for k, key in enumerate(keys.tolist()):
+            vve[(vert[key//n], vert[key % n])] = [edges[e] for e in
+                p_indices[p_indptr[k]:p_indptr[k+1]]]
+
+        v_indptr, v_indices = self.vertex_adjacency()
+        v_indices = ind[v_indices].tolist()
+        v_indptr = v_indptr.tolist()
+        ve = {v: [edges[e] for e in v_indices[v_indptr[i]:v_indptr[i+1]]]
+            for i, v in enumerate(vert)}
+
+        graph = SGraph(vert, edges, vve, ve, self.colors, self.col_signs)
+        graph.edge_nums = (initial, terminal)
+        graph.edge_cols = (self.vert_col[initial], self.vert_col[terminal])
+        graph.edge_typs = self.typ[ids]
+        return graph
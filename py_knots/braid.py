@@ -1,8 +1,11 @@
 import math
-from typing import List, Tuple, Callable, Dict
+import numpy as np
+from typing import List, Tuple, Callable, Dict, Iterable, Iterator
 from dataclasses import dataclass
 from sgraph import *
+from array_sgraph import *
 from functools import cached_property
+from collections.abc import Sequence
 
 """
 ----- Generates the spline graph for a braid. 
@@ -10,14 +13,6 @@ from functools import cached_property
 """
 
 
-# Custom slicing
-def slice(list1, a, b):
-    if(a>=b):
-        return []
-    else:
-        return list1[a:b]
-
-
 # Custom sign function
 def sign(n: int):
     if(n>0):
@@ -31,16 +26,172 @@ def transpose(n: int, lst: List) -> List:
     return lst[0:n] + [lst[n+1], lst[n]] + lst[n+2:]
 
 
+# Permutations of many braids at once.
+# words is an integer array of shape (braids, length), with each braid
+# word padded by zeros at the end. Row k of the result is the
+# braid_to_perm of the k-th braid.
+def batch_braid_to_perm(words: np.ndarray, strands: int) -> np.ndarray:
+    words = np.abs(np.asarray(words, dtype=np.int64))
+    perm = np.tile(np.arange(1, strands+1, dtype=np.int64),
+        (words.shape[0], 1))
+    rows = np.arange(words.shape[0])
+
+    for col in range(words.shape[1]):
+        i = words[:, col]
+        used = i > 0
+        r = rows[used]
+        i = i[used]
+        left = perm[r, i-1]
+        perm[r, i-1] = perm[r, i]
+        perm[r, i] = left
+
+    return perm
+
+
+# Cycle decompositions of many braids at once, for padded words as in
+# batch_braid_to_perm. Returns the label of the cycle of every strand,
+# which is the smallest strand in it (so the first entry of that cycle in
+# cycle_decomp), and the number of cycles (ct_knots) of each braid.
+def batch_cycle_decomp(words: np.ndarray,
+        strands: int) -> Tuple[np.ndarray, np.ndarray]:
+    jump = batch_braid_to_perm(words, strands) - 1
+    label = np.tile(np.arange(strands, dtype=np.int64), (jump.shape[0], 1))
+
+    # After k rounds each strand has seen the next 2^k strands of its cycle
+    rounds = 0
+    while(2**rounds < strands):
+        label = np.minimum(label, np.take_along_axis(label, jump, axis=1))
+        jump = np.take_along_axis(jump, jump, axis=1)
+        rounds += 1
+
+    counts = np.sum(label == np.arange(strands), axis=1)
+    return label+1, counts
+
+
+# Segment tree over vertex nums, keeping the position of each vertex's
+# strand and the leftmost position in each range of nums.
+# Finding the vertices in a range of nums whose strands are left of a
+# given position costs O((k+1) log n) for k vertices found.
+class PositionTree:
+
+    def __init__(self, positions: List[int]):
+        self.size = 1
+        while(self.size < len(positions)):
+            self.size *= 2
+        self.pos = list(positions)
+        self.tree = [math.inf]*(2*self.size)
+        self.tree[self.size:self.size+len(positions)] = positions
+        for node in range(self.size-1, 0, -1):
+            self.tree[node] = min(self.tree[2*node], self.tree[2*node+1])
+
+    # Moves the strand of the vertex num to position pos
+    def update(self, num: int, pos: int):
+        self.pos[num] = pos
+        node = num + self.size
+        self.tree[node] = pos
+        while(node > 1):
+            node //= 2
+            self.tree[node] = min(self.tree[2*node], self.tree[2*node+1])
+
+    # Vertex nums in [lo, hi) whose strands are at positions below pos,
+    # sorted by position.
+    def left_of(self, lo: int, hi: int, pos: int) -> List[int]:
+        found = []
+        stack = [(1, 0, self.size)]
+        while(stack):
+            node, start, end = stack.pop()
+            if((end <= lo) or (start >= hi) or (self.tree[node] >= pos)):
+                continue
+            if(end - start == 1):
+                found.append(start)
+            else:
+                mid = (start+end)//2
+                stack.append((2*node, start, mid))
+                stack.append((2*node+1, mid, end))
+
+        return sorted(found, key=lambda num: self.pos[num])
+
+
+# Compact, immutable braid word. The letters are kept in a read-only
+# int8 array (int16 or int32 for braids with more strands) together with
+# a sign, so negating a word shares the array instead of copying it.
+# Words hash and compare by their letters, and compare equal to lists.
+# They do not compare equal to tuples, whose hashes are different.
+class BraidWord(Sequence):
+
+    def __init__(self, letters: Iterable[int] = (), sign: int = 1):
+        if(isinstance(letters, BraidWord)):
+            self.data = letters.data
+            self.sign = letters.sign*sign
+            return
+
+        if(not hasattr(letters, "__len__")):
+            letters = np.fromiter(letters, dtype=np.int64)
+        letters = np.asarray(letters)
+        if(letters.dtype.kind not in "iu"):
+            letters = letters.astype(np.int64)
+        biggest = int(np.abs(letters.astype(np.int64)).max()) \
+            if len(letters) else 0
+        for dtype in [np.int8, np.int16, np.int32]:
+            if(biggest <= np.iinfo(dtype).max):
+                break
+
+        self.data = letters.astype(dtype, copy=False).view()
+        self.data.flags.writeable = False
+        self.sign = sign
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, k):
+        if(isinstance(k, slice)):
+            return BraidWord(self.data[k], self.sign)
+        return self.sign*int(self.data[k])
+
+    # Letters are converted to Python ints a block at a time
+    def __iter__(self):
+        for start in range(0, len(self.data), 4096):
+            yield from (self.sign*self.data[start:start+4096]).tolist()
+
+    def __neg__(self):
+        return BraidWord(self, -1)
+
+    def __eq__(self, other) -> bool:
+        if(isinstance(other, BraidWord)):
+            return bool(np.array_equal(self.to_array(), other.to_array()))
+        if(isinstance(other, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    @cached_property
+    def word_hash(self) -> int:
+        return hash(self.to_array().tobytes())
+
+    def __hash__(self) -> int:
+        return self.word_hash
+
+    def __repr__(self):
+        return str(list(self))
+
+    # The letters as a (new) signed NumPy array
+    def to_array(self) -> np.ndarray:
+        return self.sign*self.data.astype(np.int64)
+
+
 # Class for braids. Methods related to its permutation.
 # For generating spline graphs, we use ColBraid
+# braid_wrong may be any sequence of letters and is stored as a BraidWord.
 @dataclass(frozen=True)
 class Braid:
-    braid_wrong: List[int]
+    braid_wrong: BraidWord
     strands: int
 
+    def __post_init__(self):
+        object.__setattr__(self, "braid_wrong", BraidWord(self.braid_wrong))
+
     @cached_property
-    def braid(self):
-        return [-x for x in self.braid_wrong]
+    def braid(self) -> BraidWord:
+        return -self.braid_wrong
 
     # Finds the permutation of a braid
     @cached_property
@@ -49,11 +200,10 @@ class Braid:
         # Initial identity permutation
         perm = list(range(1, self.strands+1))
 
-        # Executes all transpositions
-        for j in range(0, len(self.braid)):
-            i = abs(self.braid[j])
-            perm = slice(perm, 0, i-1) + [perm[i], perm[i-1]] + \
-                            slice(perm, i+1, len(perm))
+        # Executes all transpositions in place
+        for letter in self.braid:
+            i = abs(letter)
+            perm[i-1], perm[i] = perm[i], perm[i-1]
 
         return perm
 
@@ -63,22 +213,25 @@ class Braid:
 
         perm = self.braid_to_perm
         n = self.strands
-        tally = list(range(1, n+1))  # Tally for all elements being permuted#
+        seen = [False]*(n+1)  # Tally for all elements being permuted
         cyc_decomp = []
 
-        # Makes cycles until all elements are exhausted
-        while(tally != []):
+        # Makes cycles starting at the smallest element not yet used
+        for start in range(1, n+1):
+            if(seen[start]):
+                continue
 
-            i = tally[0]
-            cyc = [i]
+            cyc = [start]
+            seen[start] = True
+            i = perm[start-1]
 
-            # Constructs one cycle starting at i
-            while(perm[i-1] not in cyc):
-                cyc = cyc+[perm[i-1]]
+            # Constructs one cycle starting at start
+            while(not seen[i]):
+                cyc.append(i)
+                seen[i] = True
                 i = perm[i-1]
 
-            cyc_decomp += [cyc]
-            tally = [i for i in tally if i not in cyc]
+            cyc_decomp.append(cyc)
 
         return cyc_decomp
 
@@ -90,9 +243,14 @@ class Braid:
 
 # Class for coloured braids. Generates spline graphs.
 # Extra data is col_list - a list of colours for each knot.
+# col_list is stored as a tuple, so that colored braids are hashable.
 @dataclass(frozen=True)
 class ColBraid(Braid):
-    col_list: List[int]
+    col_list: Tuple[int]
+
+    def __post_init__(self):
+        super().__post_init__()
+        object.__setattr__(self, "col_list", tuple(self.col_list))
 
     # Cycles grouped by color.
     @cached_property
@@ -144,26 +302,49 @@ class ColBraid(Braid):
     def init_graph(self, col_signs: List[int]) -> SGraph:
         vert = self.vertices
 
+        # Pairs of vertices are only added to vve once they have edges
         empty_vve = {}
         empty_ve = {}
 
-        for i in range(len(vert)):
-            for j in range(len(vert)):
-                if(j>i):
-                    empty_vve[(vert[i], vert[j])] = []
-
         for v in vert:
             empty_ve[v] = []
 
         return SGraph(vert, [], empty_vve, empty_ve, len(col_signs), col_signs)
 
-    # Goes through braid generators, adding clasps and half-twists.
-    def add_clasps_hts(self, graph: SGraph) -> SGraph:
+    # Initializes an ArraySGraph with only the right vertices and no edges.
+    def init_array_graph(self, col_signs: List[int]) -> ArraySGraph:
+        return ArraySGraph([v.col for v in self.vertices],
+            len(col_signs), col_signs)
+
+    # Goes through braid generators, yielding the clasps and half-twists
+    # as (initial, terminal, typ, col), in the order they go in the graph.
+    # The word is read once, letter by letter, and strands are swapped in
+    # place, so it can be any iterable of letters in the convention of
+    # self.braid, such as a generator or a memory-mapped array.
+    # By default it is self.braid.
+    def clasps_hts(self, word: Iterable[int] = None
+            ) -> Iterator[Tuple[SVertex, SVertex, int, int]]:
+
+        if(word is None):
+            word = self.braid
+        vert_perm = list(self.init_vert_perm)
+        vertices = self.vertices
+
+        # Vertices are numbered in order of color, so the clasp vertices of
+        # a crossing are the ones with nums from the first vertex of a
+        # higher color than the upper strand up to the lower strand.
+        col_start = [0]*(vertices[-1].col+2)
+        for v in vertices:
+            col_start[v.col+1] = v.num+1
+        for col in range(1, len(col_start)):
+            col_start[col] = max(col_start[col], col_start[col-1])
 
-        braid1 = self.braid
-        vert_perm = self.init_vert_perm
+        positions = [0]*len(vert_perm)
+        for pos, v in enumerate(vert_perm):
+            positions[v.num] = pos
+        tree = PositionTree(positions)
 
-        while(braid1 != []):
+        for letter in word:
 
             """First find the upper and lower strands. Our convention is that
             __   __
@@ -173,8 +354,8 @@ class ColBraid(Braid):
             is considered +1.
             So here, the strand that starts at the top is the lower one.
             """
-            i = abs(braid1[0])
-            sgn = sign(braid1[0])
+            i = abs(int(letter))
+            sgn = sign(letter)
 
             if(sgn == 1):
                 below = i
@@ -186,54 +367,78 @@ class ColBraid(Braid):
 
             # Half-twist if the current transposition is within the same colour
             if(upper.col == lower.col):
-                braid1 = braid1[1:]
-                graph.add_edge(vert_perm[i-1], vert_perm[i], sgn, upper.col)
+                yield (vert_perm[i-1], vert_perm[i], sgn, upper.col)
 
             # Move on if the lower strand just pulls down to a lower colour
             elif(lower.col < upper.col):
-                braid1 = braid1[1:]
-                vert_perm = transpose(i-1, vert_perm)
+                vert_perm[i-1], vert_perm[i] = vert_perm[i], vert_perm[i-1]
+                tree.update(vert_perm[i-1].num, i-1)
+                tree.update(vert_perm[i].num, i)
 
             # Otherwise (if the upper strand has a lower colour), add clasps
             else:
-                clasps = []
-                # Find clasp vertices
-                for i_vert in range(0, len(vert_perm)):
-                    if((i_vert < i-1) and
-                        (vert_perm[i_vert].col > upper.col) and
-                    (vert_perm[i_vert].num < lower.num)):
-                        clasps += [vert_perm[i_vert]]
+                # Find clasp vertices: left of position i-1, with a higher
+                # color than upper and a smaller num than lower
+                clasps = [vertices[num] for num in tree.left_of(
+                    col_start[upper.col+1], lower.num, i-1)]
 
                 # Add left clasps
                 for j in range(0, len(clasps)):
-                    graph.add_edge(upper, clasps[j], -2, upper.col)
+                    yield (upper, clasps[j], -2, upper.col)
 
                 # Add main clasp
-                graph.add_edge(upper, lower, sgn*2, upper.col)
+                yield (upper, lower, sgn*2, upper.col)
 
                 # Add right clasps
                 for j in range(0, len(clasps)):
-                    graph.add_edge(upper, clasps[j], 2, upper.col)
-
-                braid1 = braid1[1:]
-                vert_perm = transpose(i-1, vert_perm)
+                    yield (upper, clasps[j], 2, upper.col)
+
+                vert_perm[i-1], vert_perm[i] = vert_perm[i], vert_perm[i-1]
+                tree.update(vert_perm[i-1].num, i-1)
+                tree.update(vert_perm[i].num, i)
+
+    # Adds the clasps and half-twists of the word (see clasps_hts) to the
+    # graph. An ArraySGraph gets them all at once, by vertex ids.
+    def add_clasps_hts(self, graph: SGraph,
+            word: Iterable[int] = None) -> SGraph:
+        if(isinstance(graph, ArraySGraph)):
+            columns = np.array([(init.num, term.num, typ, col) for
+                init, term, typ, col in self.clasps_hts(word)],
+                dtype=np.int64).reshape(-1, 4)
+            graph.add_edges_ids(*columns.T)
+        else:
+            for edge in self.clasps_hts(word):
+                graph.add_edge(*edge)
 
         return graph
 
-    def make_graph_complete(self, col_signs: List[int]) -> SGraph:
-        graph = self.init_graph(col_signs)
+    # With array=True, the graph is built on the array-backed engine
+    # and only converted to an SGraph at the end.
+    def make_graph_complete(self, col_signs: List[int],
+            array: bool = False) -> SGraph:
+        if(array):
+            graph = self.init_array_graph(col_signs)
+        else:
+            graph = self.init_graph(col_signs)
         self.add_clasps_hts(graph)
         graph.clean_graph()
         graph.colors_connected()
         graph.make_complete()
+        if(array):
+            graph = graph.to_sgraph()
         return graph
 
-    def make_graph(self, col_signs: List[int]) -> SGraph:
-        graph = self.init_graph(col_signs)
+    def make_graph(self, col_signs: List[int], array: bool = False) -> SGraph:
+        if(array):
+            graph = self.init_array_graph(col_signs)
+        else:
+            graph = self.init_graph(col_signs)
         self.add_clasps_hts(graph)
         graph.clean_graph()
         graph.colors_connected()
         graph.make_connected()
+        if(array):
+            graph = graph.to_sgraph()
         return graph
 
     
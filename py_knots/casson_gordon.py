@@ -31,7 +31,7 @@ def casson_gordon(framing: List[int], character_q: int, char_list: List[int],
         n_i = float(char_list[i])
         omega.append(complex(cos(2*pi*n_i/q), sin(2*pi*n_i/q)))
 
-    signat = pm.signature(omega)
+    signat = pm.signature(omega)[0]
     link_mat = graph.linking_matrix(framing)
 
     casson_gordon = signat
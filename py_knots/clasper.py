@@ -58,7 +58,6 @@ class Clasper(tk.Frame):
         self.cpf = 0
         self.alexander = 0
         self.signature_value = 0
-        self.seif = ""
         self.pm = 0
 
         # Configure frames for checking the braid
@@ -242,7 +241,7 @@ class Clasper(tk.Frame):
 
                 if(self.braid_seif_control.strip() !=
                 self.braid_str.get().strip()):
-                    (self.seif, self.pm) = presentation_matrix(graph)
+                    self.pm = presentation_matrix(graph)
 
                 self.cpf = self.pm.conway_potential_function(graph)
                 self.alexander = self.pm.multivar_alexander_poly(graph)
@@ -291,7 +290,7 @@ class Clasper(tk.Frame):
             # Print the Euler characteristic of the SGraph
             self.get_sgraph_euler_char()
 
-            (self.seif, self.pm) = presentation_matrix(graph)
+            self.pm = presentation_matrix(graph)
 
         file_name = tk.filedialog.asksaveasfilename()
 
@@ -311,7 +310,7 @@ class Clasper(tk.Frame):
             f = open(file_name, 'w+')
             f.write("Braid: "+str(p.braid_wrong))
             f.write("\nStrands: "+str(p.strands)+"\n\n")
-            f.write(self.seif)
+            f.write(self.pm.describe())
             f.close()
 
     # Command for computing and displaying invariants
@@ -405,7 +404,7 @@ class Inv(tk.Frame):
 
             if(self.parent.braid_seif_control.strip() !=
             self.parent.braid_str.get().strip()):
-                (self.parent.seif, self.parent.pm) = presentation_matrix(graph)
+                self.parent.pm = presentation_matrix(graph)
 
             self.parent.cpf = self.parent.pm.conway_potential_function(graph)
             self.parent.alexander = \
@@ -436,12 +435,16 @@ class Inv(tk.Frame):
             font=(font_style, font_size)).grid(
             column=0, row=2, pady=15)
 
-        signat = self.parent.pm.signature(omega)
+        # The eigenvalues on display are the ones the signature is
+        # certified from
+        eig_vals = eigvalsh(self.parent.pm.hermitian_form(omega))
+        sgn, nullity, certified = self.parent.pm.certified_signature(omega,
+            eig_vals)
 
-        ttk.Label(self, text=str(signat[0]), font=(font_style, 30)).grid(
+        ttk.Label(self, text=str(sgn), font=(font_style, 30)).grid(
             column=1, row=2, pady=15, sticky='W')
 
-        eig_val_str = str([round_to_2(x) for x in signat[1]])[1:-1]
+        eig_val_str = str([round_to_2(x) for x in eig_vals])[1:-1]
 
         eig_val = "(Eigenvalues: "+eig_val_str+")"
         ttk.Label(self, text=str(eig_val), font=(font_style, 25)).grid(
@@ -451,7 +454,10 @@ class Inv(tk.Frame):
             font=(font_style, font_size)).grid(
             column=0, row=3, pady=15)
 
-        nullity = [round_to_2(x) for x in signat[1]].count(0)
+        # Eigenvalues that stay within rounding errors of 0 even at high
+        # precision are counted in the nullity, but it is not certified
+        if(not certified):
+            nullity = str(nullity) + " (numerical)"
 
         ttk.Label(self, text=str(nullity), font=(font_style, 30)).grid(
             column=2, row=3, pady=15, sticky='W')
@@ -0,0 +1,478 @@
+import numpy as np
+from typing import List, Tuple, Dict, Callable, Optional
+from dataclasses import dataclass
+from bisect import bisect_left
+from fractions import Fraction
+from numpy.linalg import eigh, eigvalsh
+from sympy import Poly, Symbol, gcd
+from mpmath import mp
+
+"""
+----- Inertia (signature and nullity) of stacks of hermitian matrices,
+----- used for the signatures of presentation matrices in pres_mat.py.
+"""
+
+# Eigenvalues of absolute value at most this count as zero
+ZERO_TOL = 10**(-5.0)
+
+# Smallest size of matrices for which batch_inertia uses LDL^H. Below
+# it, eigvalsh was measured to be faster than ldl_inertia.
+LDL_MIN_SIZE = 800
+
+# Bunch-Kaufman pivoting constant, (1+sqrt(17))/8
+BK_ALPHA = (1+np.sqrt(17))/8
+
+# Machine epsilon of doubles
+EPS = float(np.finfo(np.float64).eps)
+
+# Precisions, in decimal digits, at which certified_inertia decides the
+# eigenvalues that double precision leaves undecided
+CERT_DPS = [30, 60, 120]
+
+# Largest order of the roots of unity recognized by root_of_unity
+ROOT_MAX_ORDER = 10**4
+
+
+# Class for Bunch-Kaufman factorizations of hermitian matrices:
+# A[perm][:, perm] = L D L^H, with L unit lower triangular and D block
+# diagonal with 1x1 and 2x2 blocks. growth is ||L||_F^2 max ||E||_F over
+# the blocks E of D, a bound on the 2-norm of |L| |D| |L|^H, which bounds
+# the backward error (see ldl_inertia).
+@dataclass
+class LDLFactor:
+    L: np.ndarray
+    blocks: List[np.ndarray]
+    perm: np.ndarray
+    growth: float
+
+    # Numbers of positive, negative and zero eigenvalues of D, which are
+    # those of A by Sylvester's law of inertia
+    def inertia(self) -> Tuple[int, int, int]:
+        pos = 0
+        neg = 0
+        for E in self.blocks:
+            e = eigvalsh(E)
+            pos += int(np.count_nonzero(e > 0))
+            neg += int(np.count_nonzero(e < 0))
+        return pos, neg, len(self.L) - pos - neg
+
+    # Solves A x = b. The triangular solves go by blocks of rows.
+    def solve(self, b: np.ndarray, step: int = 64) -> np.ndarray:
+        n = len(self.L)
+        L = self.L
+        y = np.asarray(b, dtype=np.complex128)[self.perm]
+        for i in range(0, n, step):
+            j = min(n, i+step)
+            y[i:j] = np.linalg.solve(L[i:j, i:j], y[i:j] - L[i:j, :i] @ y[:i])
+        k = 0
+        for E in self.blocks:
+            s = len(E)
+            y[k:k+s] = np.linalg.solve(E, y[k:k+s])
+            k += s
+        for i in range(step*((n-1)//step), -1, -step):
+            j = min(n, i+step)
+            y[i:j] = np.linalg.solve(L[i:j, i:j].conj().T,
+                y[i:j] - L[j:, i:j].conj().T @ y[j:])
+        x = np.empty(n, dtype=np.complex128)
+        x[self.perm] = y
+        return x
+
+    # Estimate of the 1-norm of the inverse of A (Hager and Higham).
+    # It is a lower bound, and in practice within a small factor.
+    def inverse_norm_estimate(self) -> float:
+        n = len(self.L)
+        x = np.full(n, 1/n, dtype=np.complex128)
+        est = 0.0
+        for it in range(5):
+            y = self.solve(x)
+            new_est = float(np.abs(y).sum())
+            if((it > 0) and (new_est <= est)):
+                break
+            est = new_est
+            size = np.abs(y)
+            xi = np.where(size > 0, y/np.where(size > 0, size, 1), 1)
+            z = self.solve(xi)
+            j = int(np.argmax(np.abs(z)))
+            if((it > 0) and (np.abs(z[j]) <= np.real(z.conj() @ x))):
+                break
+            x = np.zeros(n, dtype=np.complex128)
+            x[j] = 1
+
+        if(n > 1):
+            v = (-1.0)**np.arange(n)*(1+np.arange(n)/(n-1))
+            est = max(est, 2*float(np.abs(self.solve(v)).sum())/(3*n))
+        return est
+
+
+# Swaps rows and columns i and j of a hermitian matrix in place
+def sym_swap(A: np.ndarray, i: int, j: int):
+    A[[i, j], :] = A[[j, i], :]
+    A[:, [i, j]] = A[:, [j, i]]
+
+
+# Bunch-Kaufman LDL^H factorization with partial pivoting.
+# Updates of the trailing matrix are delayed and applied once for every
+# panel of columns as a single matrix product, the way LAPACK does.
+# Until then, the columns needed for pivoting are updated one at a time.
+# The Frobenius norms of L and of the largest block of D are tracked as
+# the columns of L are found, for LDLFactor.growth.
+def bunch_kaufman(H: np.ndarray, panel: int = 64) -> LDLFactor:
+    A = np.array(H, dtype=np.complex128)
+    n = len(A)
+    L = np.eye(n, dtype=np.complex128)
+    W = np.zeros((n, n), dtype=np.complex128)
+    perm = np.arange(n)
+    blocks = []
+    l_norm = float(n)
+    d_max = 0.0
+
+    k = 0
+    start = 0
+
+    # Column j of the current Schur complement, rows k and below.
+    # Columns start to k-1 of L D L^H = W L^H are not subtracted from A yet.
+    def column(j: int) -> np.ndarray:
+        return A[k:, j] - W[k:, start:k] @ L[j, start:k].conj()
+
+    while(k < n):
+        if(k - start >= panel):
+            A[k:, k:] -= W[k:, start:k] @ L[k:, start:k].conj().T
+            start = k
+
+        col = column(k)
+        lam = np.abs(col[1:]).max(initial=0.0)
+        a = abs(col[0])
+        size = 1
+
+        if(a < BK_ALPHA*lam):
+            r = k+1+int(np.argmax(np.abs(col[1:])))
+            col_r = np.abs(column(r))
+            a_r = col_r[r-k]
+            col_r[r-k] = 0
+            sigma = col_r.max()
+            swap = -1
+            if(a*sigma >= BK_ALPHA*lam**2):
+                pass
+            elif(a_r >= BK_ALPHA*sigma):
+                swap = k
+            else:
+                swap = k+1
+                size = 2
+
+            if(swap != -1):
+                sym_swap(A, swap, r)
+                perm[[swap, r]] = perm[[r, swap]]
+                L[[swap, r], :k] = L[[r, swap], :k]
+                W[[swap, r], :k] = W[[r, swap], :k]
+
+        # The pivot block is hermitian in exact arithmetic, but its two
+        # off-diagonal entries come from different columns. Rounding
+        # errors that break the symmetry would grow through W into the
+        # later columns, so the block is made exactly hermitian.
+        cols = np.stack([column(j) for j in range(k, k+size)], axis=1)
+        E = (cols[:size] + cols[:size].conj().T)/2
+        if(lam > 0):
+            L[k+size:, k:k+size] = cols[size:] @ np.linalg.inv(E)
+        W[k:, k:k+size] = L[k:, k:k+size] @ E
+        blocks.append(E)
+
+        l_norm += float(np.linalg.norm(L[k+size:, k:k+size]))**2
+        d_max = max(d_max, float(np.linalg.norm(E)))
+        k += size
+
+    return LDLFactor(L, blocks, perm, l_norm*d_max)
+
+
+# Signature and nullity of a hermitian matrix from its Bunch-Kaufman
+# factorization. Returns (signature, nullity, cond, certain): cond is an
+# estimate of the 1-norm condition number, and certain is False when some
+# eigenvalue could be within tol of 0 (or the factorization found a zero
+# pivot, or its element growth is too large to trust the counts), so that
+# the eigenvalues have to decide.
+def ldl_inertia(H: np.ndarray, tol: float = ZERO_TOL
+        ) -> Tuple[int, int, float, bool]:
+    n = len(H)
+    if(n == 0):
+        return 0, 0, 1.0, True
+
+    factor = bunch_kaufman(H)
+    pos, neg, zero = factor.inertia()
+    if(zero != 0):
+        return pos - neg, zero, np.inf, False
+
+    # The counts are those of L D L^H = H[perm][:, perm] + dH, where
+    # |dH| <= gamma_3n (|H| + |L| |D| |L|^H) entrywise (Higham, Theorem
+    # 11.3) and gamma_3n <= 2 n eps, so the 2-norm of dH is at most res,
+    # from the element growth of the factorization. The eigenvalues of
+    # L D L^H are within res of those of H (Weyl's inequality).
+    norm = float(np.abs(H).sum(axis=0).max())
+    res = 2*n*EPS*(norm + factor.growth)
+
+    # Every eigenvalue of the hermitian matrix L D L^H is at least the
+    # inverse of the 1-norm of its inverse in absolute value. The estimate
+    # is a lower bound on that norm, which in practice it misses by at most
+    # a factor 3 (Higham), hence the factor 10 on tol and the backward
+    # error.
+    inv_norm = factor.inverse_norm_estimate()
+    cond = norm*inv_norm
+    return pos - neg, 0, cond, bool(1/inv_norm > 10*(tol + res))
+
+
+# Signature and nullity of each matrix in a stack of hermitian matrices
+# of shape (batch, n, n). Large matrices go through ldl_inertia, and only
+# the ones where it is not certain are diagonalized, counting eigenvalues
+# within tol of 0 as zero. Below LDL_MIN_SIZE, one batched eigvalsh call
+# is faster than factorizing the matrices one by one.
+def batch_inertia(H: np.ndarray, tol: float = ZERO_TOL
+        ) -> Tuple[np.ndarray, np.ndarray]:
+    sgn = np.zeros(H.shape[0], dtype=np.int64)
+    nullity = np.zeros(H.shape[0], dtype=np.int64)
+    if(H.shape[-1] == 0):
+        return sgn, nullity
+
+    if(H.shape[-1] < LDL_MIN_SIZE):
+        ambiguous = list(range(H.shape[0]))
+    else:
+        ambiguous = []
+        for b in range(H.shape[0]):
+            sgn[b], nullity[b], cond, certain = ldl_inertia(H[b], tol)
+            if(not certain):
+                ambiguous.append(b)
+
+    if(ambiguous):
+        eig_val = eigvalsh(H[ambiguous])
+        pos = np.count_nonzero(eig_val > tol, axis=-1)
+        neg = np.count_nonzero(eig_val < -tol, axis=-1)
+        sgn[ambiguous] = pos - neg
+        nullity[ambiguous] = H.shape[-1] - pos - neg
+
+    return sgn, nullity
+
+
+# The fraction p/q, 0 <= p/q < 1 and q <= ROOT_MAX_ORDER, such that w is
+# exp(2 pi i p/q) up to rounding errors, or None if there is none
+def root_of_unity(w: complex) -> Optional[Fraction]:
+    turn = Fraction(float(np.angle(w))/(2*np.pi))
+    turn = turn.limit_denominator(ROOT_MAX_ORDER) % 1
+    root = np.exp(2j*np.pi*turn.numerator/turn.denominator)
+    if(abs(w - root) <= 8*EPS):
+        return turn
+    return None
+
+
+# w as an mpmath number at the current precision: the root of unity that
+# w rounds, computed at that precision, or else w itself
+def mp_unit(w: complex):
+    turn = root_of_unity(w)
+    if(turn is None):
+        return mp.mpc(w)
+    return mp.expjpi(2*mp.mpf(turn.numerator)/turn.denominator)
+
+
+# Entrywise conversion of a complex array to mpmath numbers
+to_mp = np.frompyfunc(mp.mpc, 1, 1)
+
+
+# Frobenius norm of an array of mpmath numbers
+def mp_norm(A: np.ndarray):
+    return mp.sqrt(mp.fsum([abs(x)**2 for x in A.flat]))
+
+
+# Rank of an integer matrix, by fraction-free (Bareiss) elimination on
+# Python integers, so that it is exact
+def integer_rank(A: np.ndarray) -> int:
+    A = np.array(A, dtype=object)
+    rank = 0
+    prev = 1
+    for j in range(A.shape[1]):
+        if(rank == A.shape[0]):
+            break
+        nonzero = np.flatnonzero(A[rank:, j] != 0)
+        if(len(nonzero) == 0):
+            continue
+        p = rank + int(nonzero[0])
+        A[[rank, p]] = A[[p, rank]]
+
+        # Every entry below the pivot row is now a minor of A divided by
+        # the previous one, so the division is exact
+        piv = A[rank, j]
+        A[rank+1:, j+1:] = (piv*A[rank+1:, j+1:] -
+            np.outer(A[rank+1:, j], A[rank, j+1:]))//prev
+        A[rank+1:, j] = 0
+        prev = piv
+        rank += 1
+    return rank
+
+
+# Signature and nullity of a hermitian matrix without a cutoff.
+# H is the matrix in double precision, within input_err (in Frobenius
+# norm) of the exact one, and exact_form() builds the exact one as an
+# array of mpmath numbers at the current precision, or exact_form is None
+# if the exact matrix is not known. nullity is the exact nullity, if it
+# is known. Returns (signature, nullity, certified).
+#
+# The eigenvalues of H are within radius of the exact ones (Weyl's
+# inequality and the backward error of eigvalsh), so the signs of those
+# outside of it are certain, and usually that is all of them. Otherwise,
+# let Q = [Qc, Z] be the eigenvectors of H, with Qc those of the decided
+# eigenvalues. By Sylvester's law and Haynsworth's formula, the inertia
+# of the exact matrix E is that of A = Qc^H E Qc plus that of
+# Z^H E Z - R^H A^(-1) R, where R = Qc^H E Z. A is nearly diagonal, and
+# its inertia is that of the decided eigenvalues. Z is corrected at each
+# precision of CERT_DPS until R is negligible, so only the small matrix
+# Z^H E Z is diagonalized there, and only products with Z cost more
+# than in double precision. Eigenvalues still undecided at the highest
+# precision, or in double precision when exact_form is None, are counted
+# as zero, and then certified is False, unless their number is the known
+# nullity. eig_val are the eigenvalues of H, if the caller already has
+# them.
+def certified_inertia(H: np.ndarray, input_err: float,
+        exact_form: Optional[Callable[[], np.ndarray]],
+        nullity: Optional[int] = None,
+        eig_val: Optional[np.ndarray] = None) -> Tuple[int, int, bool]:
+    n = len(H)
+    radius = input_err + 10*n*EPS*float(np.linalg.norm(H))
+    e = eigvalsh(H) if eig_val is None else eig_val
+    pos = int(np.count_nonzero(e > radius))
+    neg = int(np.count_nonzero(e < -radius))
+    left = n - pos - neg
+    if((left == 0) or (left == nullity)):
+        return pos - neg, left, True
+    if(exact_form is None):
+        return pos - neg, left if (nullity is None) else nullity, False
+
+    e, Q = eigh(H)
+    sure = np.abs(e) > radius
+    A = Q[:, sure].conj().T @ H @ Q[:, sure]
+    off = float(np.linalg.norm(A - np.diag(e[sure])))
+    gap = np.abs(e[sure]).min(initial=np.inf) - off - radius
+    if(gap <= 0):
+        # A could be singular, so everything goes to higher precision
+        sure[:] = False
+        A = A[:0, :0]
+        gap = np.inf
+    pos_sure = int(np.count_nonzero(e[sure] > 0))
+    neg_sure = int(np.count_nonzero(e[sure] < 0))
+    A_inv = np.linalg.inv(A)
+    Qc = to_mp(Q[:, sure])
+    Qc_h = to_mp(Q[:, sure].conj().T)
+
+    for dps in CERT_DPS:
+        with mp.workdps(dps):
+            E = exact_form()
+            E = (E + E.conj().T)/2
+            norm = mp_norm(E)
+            Z = to_mp(Q[:, ~sure])
+            for it in range(dps//5 + 1):
+                EZ = E @ Z
+                R = Qc_h @ EZ
+                r = mp_norm(R)
+                if((r**2/gap <= n*mp.eps*norm) or (it == dps//5)):
+                    break
+                Y = A_inv @ R.astype(np.complex128)
+                Z = Z - Qc @ to_mp(Y)
+
+            S = Z.conj().T @ EZ
+            s = mp.eigh(mp.matrix(((S + S.conj().T)/2).tolist()),
+                eigvals_only=True)
+            rad = r**2/gap + 10*n*mp.eps*norm*mp_norm(Z)**2
+            pos = pos_sure + sum([1 for x in s if x > rad])
+            neg = neg_sure + sum([1 for x in s if x < -rad])
+        left = n - pos - neg
+        if((left == 0) or (left == nullity)):
+            return pos - neg, left, True
+
+    if(nullity is None):
+        nullity = left
+    return pos - neg, nullity, False
+
+
+# Grid of characters on the torus (S^1)^colors: all tuples of
+# exp(2 pi i n_j/q) with 0 < n_j < q, as an array of shape
+# (q-1, ..., q-1, colors).
+def torus_grid(colors: int, q: int) -> np.ndarray:
+    roots = np.exp(2j*np.pi*np.arange(1, q)/q)
+    grids = np.meshgrid(*([roots]*colors), indexing='ij')
+    return np.stack(grids, axis=-1)
+
+
+# Angles 0 < theta < 2 pi where a polynomial in one variable with integer
+# coefficients (exponent -> coefficient) vanishes at exp(i theta), with
+# the multiplicities of these roots, as a sorted list of (theta, mult).
+# Roots on the unit circle are the common roots of the polynomial and its
+# reciprocal, so they are roots of their gcd g, with the same
+# multiplicity, and g is (up to factors t-1 and t+1) self-reciprocal of
+# even degree 2m. Then g(t) = t^m h(t+1/t), and the real roots x of h in
+# (-2, 2), isolated exactly by SymPy, give the angles
+# theta = arccos(x/2) and 2 pi - theta. As dx/dt = 1 - 1/t^2 does not
+# vanish there, x has the multiplicity of exp(i theta). The angles are
+# rounded from 30 digits, so exp(i theta) is within a few eps of the root.
+def unit_circle_roots(coeffs: Dict[int, int]) -> List[Tuple[float, int]]:
+    t = Symbol("t")
+    low = min(coeffs)
+    p = Poly({(e-low,): c for e, c in coeffs.items()}, t)
+    g = gcd(p, Poly(list(reversed(p.all_coeffs())), t))
+
+    roots = []
+    for root in [1, -1]:
+        mult = 0
+        while(g.degree() > 0 and g.eval(root) == 0):
+            g = g.quo(Poly(t-root, t))
+            mult += 1
+        if((root == -1) and (mult > 0)):
+            roots.append((float(np.pi), mult))
+
+    # g(t)/t^m = c_m + sum_k c_(m+k) (t^k + t^(-k)), and t^k + t^(-k) is
+    # a polynomial P_k in x = t + 1/t with P_(k+1) = x P_k - P_(k-1)
+    x = Symbol("x")
+    c = list(reversed(g.all_coeffs()))
+    m = len(c)//2
+    P = [Poly(2, x), Poly(x, x)]
+    h = Poly(c[m], x)
+    for k in range(1, m+1):
+        if(k >= len(P)):
+            P.append(Poly(x, x)*P[-1] - P[-2])
+        h = h + c[m+k]*P[k]
+
+    if(h.degree() > 0):
+        for f, mult in h.sqf_list()[1]:
+            for r in f.real_roots():
+                with mp.workdps(30):
+                    r = mp.mpf(str(r.evalf(30)))
+                    if(-2 < r < 2):
+                        theta = mp.acos(r/2)
+                        roots += [(float(theta), mult),
+                            (float(2*mp.pi - theta), mult)]
+
+    return sorted(roots)
+
+
+# The signature of a one-variable presentation matrix as a function of the
+# angle theta of omega = exp(i theta), 0 < theta < 2 pi.
+# jumps are the angles where the determinant vanishes, in increasing
+# order. arc_signatures[k] is the signature on the open arc before
+# jumps[k] (the last one is the arc after the last jump), and
+# jump_signatures and jump_nullities are the values at the jumps.
+# jump_certified[k] is False if the values at jumps[k] are only numerical
+# (see certified_inertia).
+@dataclass
+class SignatureFunction:
+    jumps: List[float]
+    arc_signatures: List[int]
+    jump_signatures: List[int]
+    jump_nullities: List[int]
+    jump_certified: List[bool]
+
+    # Signature at exp(i theta)
+    def __call__(self, theta: float) -> int:
+        k = bisect_left(self.jumps, theta)
+        if((k < len(self.jumps)) and (self.jumps[k] == theta)):
+            return self.jump_signatures[k]
+        return self.arc_signatures[k]
+
+    # Nullity at exp(i theta)
+    def nullity(self, theta: float) -> int:
+        k = bisect_left(self.jumps, theta)
+        if((k < len(self.jumps)) and (self.jumps[k] == theta)):
+            return self.jump_nullities[k]
+        return 0
@@ -0,0 +1,366 @@
+from typing import List, Tuple, Dict
+from dataclasses import dataclass
+from heapq import heappush, heappop
+from sympy import Poly, S, Symbol, Add, Mul
+
+"""
+----- Integer polynomials in t0, ..., tk for determinants of
+----- presentation matrices, without SymPy in the inner loops.
+----- Converting to and from SymPy only happens in pres_mat.py.
+"""
+
+
+# Class for polynomials with integer coefficients.
+# terms maps exponent tuples (one exponent per variable) to non-zero
+# integer coefficients.
+@dataclass(frozen=True)
+class IntPoly:
+    terms: Dict[Tuple[int, ...], int]
+    nvars: int
+
+    # The constant polynomial c
+    @classmethod
+    def constant(cls, c: int, nvars: int) -> 'IntPoly':
+        if(c == 0):
+            return cls({}, nvars)
+        return cls({(0,)*nvars: c}, nvars)
+
+    # Converts a SymPy expression in the given variables
+    @classmethod
+    def from_expr(cls, expr, variables: List[Symbol]) -> 'IntPoly':
+        terms = {}
+        for exp, c in Poly(expr, *variables).terms():
+            if(c != 0):
+                terms[tuple(exp)] = int(c)
+        return cls(terms, len(variables))
+
+    # Converts back to a SymPy expression in the given variables
+    def as_expr(self, variables: List[Symbol]) -> Add:
+        if(self.terms == {}):
+            return S(0)
+        return Poly.from_dict(self.terms, *variables).as_expr()
+
+    def is_zero(self) -> bool:
+        return self.terms == {}
+
+    def __bool__(self) -> bool:
+        return self.terms != {}
+
+    def __neg__(self) -> 'IntPoly':
+        return type(self)({exp: -c for exp, c in self.terms.items()},
+            self.nvars)
+
+    def __add__(self, other: 'IntPoly') -> 'IntPoly':
+        terms = dict(self.terms)
+        for exp, c in other.terms.items():
+            c = terms.get(exp, 0) + c
+            if(c == 0):
+                terms.pop(exp, None)
+            else:
+                terms[exp] = c
+        return type(self)(terms, self.nvars)
+
+    def __sub__(self, other: 'IntPoly') -> 'IntPoly':
+        return self + (-other)
+
+    def __mul__(self, other) -> 'IntPoly':
+        if(isinstance(other, int)):
+            if(other == 0):
+                return type(self)({}, self.nvars)
+            return type(self)({exp: c*other for exp, c in
+                self.terms.items()}, self.nvars)
+
+        terms = {}
+        for exp1, c1 in self.terms.items():
+            for exp2, c2 in other.terms.items():
+                exp = tuple([a+b for a, b in zip(exp1, exp2)])
+                terms[exp] = terms.get(exp, 0) + c1*c2
+        return type(self)({exp: c for exp, c in terms.items() if c != 0},
+            self.nvars)
+
+    __rmul__ = __mul__
+
+    # Exact division by another polynomial.
+    # Quotient terms come out in decreasing lexicographic order, and a heap
+    # merges the terms of self with the products of the quotient so far
+    # and the divisor (Johnson's division), so this costs about
+    # O(|q| |g| log |q|). Raises ArithmeticError if the division is not exact.
+    def exact_div(self, other: 'IntPoly') -> 'IntPoly':
+        if(other.is_zero()):
+            raise ZeroDivisionError("Division by the zero polynomial")
+        if(self.is_zero()):
+            return self
+
+        # Negated exponents make heapq pop the largest exponent first
+        def key(exp):
+            return tuple([-a for a in exp])
+
+        f = sorted(self.terms.items(), key=lambda t: key(t[0]))
+        g = sorted(other.terms.items(), key=lambda t: key(t[0]))
+        g_exp, g_c = g[0]
+
+        q = []
+        heap = []
+        fi = 0
+
+        while((fi < len(f)) or heap):
+            if((fi < len(f)) and
+            ((not heap) or (key(f[fi][0]) <= heap[0][0]))):
+                exp = f[fi][0]
+            else:
+                exp = tuple([-a for a in heap[0][0]])
+
+            c = 0
+            if((fi < len(f)) and (f[fi][0] == exp)):
+                c = f[fi][1]
+                fi += 1
+
+            # Subtract the products q[i]*g[j] with this exponent
+            while(heap and (heap[0][0] == key(exp))):
+                k, i, j = heappop(heap)
+                c -= q[i][1]*g[j][1]
+                if(j+1 < len(g)):
+                    heappush(heap, (key(tuple([a+b for a, b in
+                        zip(q[i][0], g[j+1][0])])), i, j+1))
+
+            if(c == 0):
+                continue
+
+            q_exp = tuple([a-b for a, b in zip(exp, g_exp)])
+            if((min(q_exp) < 0) or (c % g_c != 0)):
+                raise ArithmeticError("Not divisible")
+            q.append((q_exp, c//g_c))
+            if(len(g) > 1):
+                heappush(heap, (key(tuple([a+b for a, b in
+                    zip(q_exp, g[1][0])])), len(q)-1, 1))
+
+        return IntPoly(dict(q), self.nvars)
+
+
+# Class for Laurent polynomials with integer coefficients.
+# Same as IntPoly, but exponents can be negative, and transformations
+# like t -> t^k or multiplication by monomials act on the exponents
+# directly.
+@dataclass(frozen=True)
+class LaurentPoly(IntPoly):
+
+    @classmethod
+    def from_poly(cls, f: IntPoly) -> 'LaurentPoly':
+        return cls(dict(f.terms), f.nvars)
+
+    # The monomial t_v^e
+    @classmethod
+    def monomial(cls, v: int, e: int, nvars: int) -> 'LaurentPoly':
+        exp = [0]*nvars
+        exp[v] = e
+        return cls({tuple(exp): 1}, nvars)
+
+    # Converts to a SymPy expression in the given variables
+    def as_expr(self, variables: List[Symbol]) -> Add:
+        return Add(*[c*Mul(*[var**e for var, e in zip(variables, exp)])
+            for exp, c in self.terms.items()])
+
+    # Exponents of the largest monomial dividing the polynomial
+    def min_exps(self) -> Tuple[int, ...]:
+        return tuple([min([exp[v] for exp in self.terms], default=0)
+            for v in range(self.nvars)])
+
+    # Multiplies by t^shift
+    def shift(self, shift: Tuple[int, ...]) -> 'LaurentPoly':
+        return LaurentPoly({tuple([a+b for a, b in zip(exp, shift)]): c
+            for exp, c in self.terms.items()}, self.nvars)
+
+    # Divides by the largest monomial dividing the polynomial, so that the
+    # result is a polynomial not divisible by any of the variables
+    def strip(self) -> 'LaurentPoly':
+        return self.shift(tuple([-e for e in self.min_exps()]))
+
+    # Substitutes t_v -> t_v^k in every variable
+    def scale_exps(self, k: int) -> 'LaurentPoly':
+        return LaurentPoly({tuple([k*e for e in exp]): c
+            for exp, c in self.terms.items()}, self.nvars)
+
+    # Substitutes t_v^2 -> t_v in every variable, the way SymPy's
+    # subs(t_v**2, t_v) does: even exponents are halved, and odd
+    # exponents are left alone.
+    def halve_even_exps(self) -> 'LaurentPoly':
+        terms = {}
+        for exp, c in self.terms.items():
+            exp = tuple([e//2 if e % 2 == 0 else e for e in exp])
+            terms[exp] = terms.get(exp, 0) + c
+        return LaurentPoly({exp: c for exp, c in terms.items() if c != 0},
+            self.nvars)
+
+    # Exact division in the ring of Laurent polynomials.
+    # Raises ArithmeticError if the division is not exact.
+    def exact_div(self, other: 'IntPoly') -> 'LaurentPoly':
+        other = LaurentPoly.from_poly(other)
+        f_low = self.min_exps()
+        g_low = other.min_exps()
+        q = IntPoly.exact_div(self.strip(), other.strip())
+        return LaurentPoly.from_poly(q).shift(
+            tuple([a-b for a, b in zip(f_low, g_low)]))
+
+    # Divides by other as many times as possible, at most count times.
+    # Returns the quotient and the number of divisions.
+    def divide_out(self, other: 'IntPoly', count: int
+            ) -> Tuple['LaurentPoly', int]:
+        f = self
+        for k in range(count):
+            try:
+                f = f.exact_div(other)
+            except ArithmeticError:
+                return f, k
+        return f, count
+
+
+# Bounds for the determinant: the degree in each variable and the sum of
+# the absolute values of the coefficients (a Hadamard-style bound).
+def det_bounds(M: List[List[IntPoly]], nvars: int) -> Tuple[List[int], int]:
+    n = len(M)
+
+    def deg(f: IntPoly, v: int) -> int:
+        return max([exp[v] for exp in f.terms], default=0)
+
+    def norm(f: IntPoly) -> int:
+        return sum(abs(c) for c in f.terms.values())
+
+    degrees = []
+    for v in range(nvars):
+        by_rows = sum(max(deg(M[i][j], v) for j in range(n))
+            for i in range(n))
+        by_cols = sum(max(deg(M[i][j], v) for i in range(n))
+            for j in range(n))
+        degrees.append(min(by_rows, by_cols))
+
+    by_rows = 1
+    by_cols = 1
+    for i in range(n):
+        by_rows *= sum(norm(M[i][j]) for j in range(n))
+        by_cols *= sum(norm(M[j][i]) for j in range(n))
+
+    return degrees, min(by_rows, by_cols)
+
+
+# Bareiss algorithm for the determinant of a square matrix of IntPolys.
+# Every intermediate entry is a minor of the matrix,
+# so all divisions are exact.
+def bareiss(M: List[List[IntPoly]], nvars: int) -> IntPoly:
+    n = len(M)
+    if(n == 0):
+        return IntPoly.constant(1, nvars)
+
+    M = [list(row) for row in M]
+    sign = 1
+    prev = IntPoly.constant(1, nvars)
+
+    for k in range(n-1):
+        # Get non-zero pivots
+        if(M[k][k].is_zero()):
+            for j in range(k+1, n):
+                if(not M[j][k].is_zero()):
+                    M[k], M[j] = M[j], M[k]
+                    sign = -sign
+                    break
+            else:
+                return IntPoly.constant(0, nvars)
+
+        # Update matrix
+        pivot = M[k][k]
+        for i in range(k+1, n):
+            for j in range(k+1, n):
+                f = M[i][j]*pivot - M[i][k]*M[k][j]
+                M[i][j] = f.exact_div(prev)
+        prev = pivot
+
+    return M[n-1][n-1]*sign
+
+
+# Kronecker substitution: packs polynomials into integers by
+# t_v -> X^(s_v), with X = 2^(8*width) and s_(v+1) = s_v*(degrees[v]+1).
+# This is a ring homomorphism, and it is injective on polynomials with
+# degree at most degrees[v] in t_v and coefficients of absolute value
+# below X/2.
+@dataclass(frozen=True)
+class KroneckerPacking:
+    degrees: List[int]
+    width: int
+
+    # Smallest packing for the given degree and coefficient bounds
+    @classmethod
+    def for_bounds(cls, degrees: List[int], bound: int
+            ) -> 'KroneckerPacking':
+        return cls(list(degrees), (2*bound).bit_length()//8 + 1)
+
+    @property
+    def strides(self) -> List[int]:
+        strides = [1]
+        for d in self.degrees:
+            strides.append(strides[-1]*(d+1))
+        return strides
+
+    def pack(self, f: IntPoly) -> int:
+        strides = self.strides
+        bits = 8*self.width
+        return sum(c << (bits*sum(e*s for e, s in zip(exp, strides)))
+            for exp, c in f.terms.items())
+
+    # Reads off the coefficients as balanced digits in base X
+    def unpack(self, N: int) -> IntPoly:
+        strides = self.strides
+        count = strides[-1]
+        bits = 8*self.width
+        half = 1 << (bits-1)
+
+        # Adding X/2 to every digit makes them all non-negative
+        offset = sum(half << (bits*k) for k in range(count))
+        data = (N + offset).to_bytes(count*self.width, "little")
+
+        terms = {}
+        for k in range(count):
+            c = int.from_bytes(data[k*self.width:(k+1)*self.width],
+                "little") - half
+            if(c != 0):
+                terms[tuple((k//s) % (d+1) for s, d in
+                    zip(strides, self.degrees))] = c
+        return IntPoly(terms, len(self.degrees))
+
+
+# Bareiss algorithm on Kronecker-packed entries.
+# Every intermediate entry is the image of a minor of the matrix, and
+# minors satisfy the same degree and coefficient bounds as the determinant,
+# so the packed pivots are non-zero exactly when the minors are and the
+# integer divisions are exact. Only the determinant is unpacked.
+def kronecker_bareiss(M: List[List[IntPoly]], nvars: int) -> IntPoly:
+    n = len(M)
+    if(n == 0):
+        return IntPoly.constant(1, nvars)
+
+    degrees, bound = det_bounds(M, nvars)
+    if(bound == 0):
+        return IntPoly.constant(0, nvars)
+
+    packing = KroneckerPacking.for_bounds(degrees, bound)
+    M = [[packing.pack(f) for f in row] for row in M]
+    sign = 1
+    prev = 1
+
+    for k in range(n-1):
+        # Get non-zero pivots
+        if(M[k][k] == 0):
+            for j in range(k+1, n):
+                if(M[j][k] != 0):
+                    M[k], M[j] = M[j], M[k]
+                    sign = -sign
+                    break
+            else:
+                return IntPoly.constant(0, nvars)
+
+        # Update matrix
+        pivot = M[k][k]
+        for i in range(k+1, n):
+            for j in range(k+1, n):
+                M[i][j] = (M[i][j]*pivot - M[i][k]*M[k][j])//prev
+        prev = pivot
+
+    return packing.unpack(M[n-1][n-1]*sign)
@@ -0,0 +1,179 @@
+import numpy as np
+from typing import List, Tuple, Dict
+from int_poly import *
+
+"""
+----- Determinants of polynomial matrices by evaluation and interpolation
+----- modulo several primes, recombined with the Chinese remainder theorem.
+----- Used as the "modular" backend of PolyMatrix in pres_mat.py.
+"""
+
+# Primes are kept below 2^25, so that products of two residues (and sums
+# of a few hundred of them) fit in int64.
+PRIME_BOUND = 2**25
+
+
+# Checks if a (small) number is prime
+def is_prime(p: int) -> bool:
+    if(p < 2):
+        return False
+    d = 2
+    while(d*d <= p):
+        if(p % d == 0):
+            return False
+        d += 1
+    return True
+
+
+# Primes just below PRIME_BOUND, largest first, with product above bound
+def choose_primes(bound: int) -> List[int]:
+    primes = []
+    prod = 1
+    p = PRIME_BOUND
+    while(prod <= bound):
+        p -= 1
+        if(is_prime(p)):
+            primes.append(p)
+            prod *= p
+    return primes
+
+
+# Modular inverses of an array of residues (0 is sent to 0)
+def inv_mod(a: np.ndarray, p: int) -> np.ndarray:
+    result = np.ones_like(a)
+    base = a % p
+    e = p-2
+    while(e):
+        if(e & 1):
+            result = result*base % p
+        base = base*base % p
+        e >>= 1
+    return result
+
+
+# Determinants of a stack of matrices modulo p, by Gaussian elimination
+# run on all of them at once. A has shape (batch, n, n).
+def batch_det_mod(A: np.ndarray, p: int) -> np.ndarray:
+    A = A % p
+    batch, n, n = A.shape
+    rows = np.arange(batch)
+    det = np.ones(batch, dtype=np.int64)
+
+    for k in range(n):
+        # First row at or below k with a non-zero entry in column k
+        nonzero = A[:, k:, k] != 0
+        piv = np.argmax(nonzero, axis=1) + k
+        det[~nonzero.any(axis=1)] = 0
+
+        swap = piv != k
+        row_k = A[rows, k].copy()
+        A[rows, k] = A[rows, piv]
+        A[rows, piv] = row_k
+        det[swap] = (p - det[swap]) % p
+
+        pivot = A[:, k, k]
+        det = det*pivot % p
+        factor = A[:, k+1:, k]*inv_mod(pivot, p)[:, None] % p
+        A[:, k+1:, k:] = (A[:, k+1:, k:] -
+            factor[:, :, None]*A[:, None, k, k:] % p) % p
+
+    return det
+
+
+# Interpolates along the first axis: values at the points 0, 1, ..., d
+# become the coefficients of t^0, ..., t^d, modulo p.
+def interpolate_mod(values: np.ndarray, p: int) -> np.ndarray:
+    d = values.shape[0]-1
+    x = np.arange(d+1, dtype=np.int64)
+    shape = (-1,) + (1,)*(values.ndim-1)
+
+    # Newton divided differences
+    c = values.copy() % p
+    for j in range(1, d+1):
+        inv = inv_mod((x[j:] - x[:-j]) % p, p).reshape(shape)
+        c[j:] = (c[j:] - c[j-1:-1]) % p * inv % p
+
+    # Newton form to monomial form
+    coeffs = np.zeros_like(c)
+    coeffs[0] = c[d]
+    for i in range(d-1, -1, -1):
+        shifted = np.zeros_like(coeffs)
+        shifted[1:] = coeffs[:-1]
+        coeffs = (shifted - x[i]*coeffs) % p
+        coeffs[0] = (coeffs[0] + c[i]) % p
+
+    return coeffs
+
+
+# Determinant of a square matrix of IntPolys by evaluation at a grid of
+# points modulo primes, interpolation and CRT.
+# Points are evaluated in chunks of at most chunk matrices at a time.
+def modular_det(M: List[List[IntPoly]], nvars: int,
+        chunk: int = 2**22) -> IntPoly:
+    n = len(M)
+    if(n == 0):
+        return IntPoly.constant(1, nvars)
+
+    degrees, bound = det_bounds(M, nvars)
+    if(bound == 0):
+        return IntPoly.constant(0, nvars)
+
+    # Integer coefficient matrix of each monomial
+    coeff_mats = {}
+    for i in range(n):
+        for j in range(n):
+            for exp, c in M[i][j].terms.items():
+                if(exp not in coeff_mats):
+                    coeff_mats[exp] = np.zeros((n, n), dtype=object)
+                coeff_mats[exp][i, j] = c
+    monomials = list(coeff_mats)
+    exps = np.array(monomials, dtype=np.int64).reshape(len(monomials), nvars)
+
+    # The grid of evaluation points
+    grid_shape = tuple(d+1 for d in degrees)
+    points = np.indices(grid_shape).reshape(nvars, -1).T
+    step = max(1, chunk//(n*n))
+
+    residues = []
+    primes = choose_primes(2*bound)
+    for p in primes:
+        mats = np.array([(coeff_mats[exp] % p).astype(np.int64)
+            for exp in monomials])
+
+        values = np.zeros(len(points), dtype=np.int64)
+        for start in range(0, len(points), step):
+            pts = points[start:start+step]
+
+            # Value of each monomial at each point
+            weights = np.ones((len(pts), len(monomials)), dtype=np.int64)
+            for v in range(nvars):
+                for e in range(1, exps[:, v].max(initial=0)+1):
+                    weights[:, exps[:, v] >= e] = weights[:,
+                        exps[:, v] >= e]*pts[:, v, None] % p
+
+            A = np.zeros((len(pts), n, n), dtype=np.int64)
+            for m in range(len(monomials)):
+                A = (A + weights[:, m, None, None]*mats[m]) % p
+            values[start:start+step] = batch_det_mod(A, p)
+
+        coeffs = values.reshape(grid_shape)
+        for v in range(nvars):
+            coeffs = np.moveaxis(interpolate_mod(
+                np.moveaxis(coeffs, v, 0), p), 0, v)
+        residues.append(coeffs.reshape(-1))
+
+    # Chinese remainder theorem, then the symmetric range
+    total = np.zeros(len(points), dtype=object)
+    modulus = 1
+    for p, r in zip(primes, residues):
+        r = r.astype(object)
+        t = ((r - total) % p)*pow(modulus, -1, p) % p
+        total = total + modulus*t
+        modulus *= p
+    total = np.where(total > modulus//2, total - modulus, total)
+
+    terms = {}
+    for point, c in zip(points.tolist(), total.tolist()):
+        if(c != 0):
+            terms[tuple(point)] = int(c)
+    return IntPoly(terms, nvars)
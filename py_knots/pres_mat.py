@@ -1,140 +1,350 @@
 from sgraph import *
+from int_poly import *
+from modular_det import *
+from sparse_det import *
+from inertia import *
 from sympy import *
 from sympy.matrices import Matrix, zeros
-import copy
-import cmath
+from typing import List, Tuple, Optional
+from collections import OrderedDict
+import hashlib
 import numpy as np
-from numpy.linalg import eigh
+from numpy.linalg import eigh, eigvalsh
 
 
-# Custom function to swap rows in a matrix
-def swap_rows(i: int, j: int, M: Matrix) -> None:
-    for ind in range(shape(M)[1]):
-        a = copy.deepcopy(M[i, ind])
-        M[i, ind] = -M[j, ind]
-        M[j, ind] = a
+# Determinant algorithms for matrices of IntPolys, by name.
+# Each takes the matrix and the number of variables and returns an IntPoly.
+DET_BACKENDS = {
+    "bareiss": bareiss,
+    "modular": modular_det,
+    "kronecker": kronecker_bareiss,
+}
+
+# Determinants already computed, as IntPolys, by PolyMatrix.cache_key.
+# Shared by all PolyMatrix instances, so matrices rebuilt from the same
+# graph do not run the elimination again. Only the DET_CACHE_SIZE most
+# recently used ones are kept.
+DET_CACHE = OrderedDict()
+DET_CACHE_SIZE = 32
 
 
 # Class for presentation matrices
-@dataclass(frozen=True)
+# The matrix is sum_k tensor[k]*t^exps[k]: tensor has one integer matrix
+# for each monomial, and exps[k] holds the exponents of the variables in
+# the k-th monomial. For presentation matrices these are the signed
+# generalized Seifert matrices and the subsets of lowered colors.
+# backend is the name of the determinant algorithm in DET_BACKENDS
+@dataclass(frozen=True, eq=False)
 class PolyMatrix:
     variables: List[Symbol]
-    M: Matrix
-
-    # Bareiss algorithm for the determinant
-    # Standard implementation
+    tensor: np.ndarray
+    exps: np.ndarray
+    backend: str = "bareiss"
+
+    # Builds the tensor of a SymPy matrix with polynomial entries
+    @classmethod
+    def from_matrix(cls, variables: List[Symbol], M: Matrix,
+            backend: str = "bareiss") -> 'PolyMatrix':
+        n = shape(M)[0]
+        monomials = {}
+        for i in range(n):
+            for j in range(n):
+                f = IntPoly.from_expr(M[i, j], variables)
+                for exp, c in f.terms.items():
+                    if(exp not in monomials):
+                        monomials[exp] = np.zeros((n, n), dtype=np.int64)
+                    monomials[exp][i, j] = c
+
+        tensor = np.array(list(monomials.values()), dtype=np.int64)
+        exps = np.array(list(monomials.keys()), dtype=np.int64)
+        return cls(variables, tensor.reshape(-1, n, n),
+            exps.reshape(-1, len(variables)), backend)
+
+    # Size of the matrix
+    @property
+    def size(self) -> int:
+        return self.tensor.shape[1]
+
+    # The symbolic matrix, only built when asked for
     @cached_property
-    def bareiss_det(self) -> Add:
+    def M(self) -> Matrix:
+        n = self.size
+        monomials = [prod([var**int(e) for var, e in
+            zip(self.variables, exp)]) for exp in self.exps]
+
+        cells = {}
+        for k, i, j in zip(*np.nonzero(self.tensor)):
+            cells.setdefault((i, j), []).append(
+                int(self.tensor[k, i, j])*monomials[k])
+
+        M = zeros(n)
+        for (i, j), terms in cells.items():
+            M[i, j] = Add(*terms)
+        return M
+
+    # The symbolic matrix and the generalized Seifert matrices as text,
+    # for a matrix built by presentation_matrix. Each monomial there is
+    # the product of the lowered colors of one sign tuple, and its matrix
+    # is the generalized Seifert matrix times the sign.
+    def describe(self) -> str:
+        seif = ""
+        for exp, mat in zip(self.exps, self.tensor):
+            lifts = 1 - 2*exp
+            seif += str(lifts.tolist()) + "\n" + \
+                str(Matrix((int(np.prod(lifts))*mat).tolist())) + "\n\n"
+
+        return ("Presentation Matrix\n" + str(self.M) +
+            "\n\n\nGeneralized Seifert Matrices\n\n" + seif)
+
+    # The entries as IntPolys
+    @cached_property
+    def entries(self) -> List[List[IntPoly]]:
+        n = self.size
+        nvars = len(self.variables)
+        exps = [tuple(exp) for exp in self.exps.tolist()]
+
+        entries = [[{} for j in range(n)] for i in range(n)]
+        for k, i, j in zip(*np.nonzero(self.tensor)):
+            cell = entries[i][j]
+            cell[exps[k]] = cell.get(exps[k], 0) + int(self.tensor[k, i, j])
+
+        return [[IntPoly({exp: c for exp, c in cell.items() if c != 0},
+            nvars) for cell in row] for row in entries]
+
+    # The matrix with the variables set to the given numbers
+    def evaluate(self, point: List[complex]) -> np.ndarray:
+        point = np.asarray(point, dtype=np.complex128)
+        weights = np.prod(point**self.exps, axis=1)
+        return (weights @ self.flat_tensor).reshape(self.size, self.size)
+
+    # The tensor as a (monomials, n*n) float array, built once so that
+    # every evaluation is a single matrix product
+    @cached_property
+    def flat_tensor(self) -> np.ndarray:
+        return self.tensor.reshape(len(self.tensor), -1).astype(np.float64)
+
+    # The hermitian matrix (1-conj(w_0))...(1-conj(w_k)) M(w) whose
+    # signature is the signature of the link at omega
+    def hermitian_form(self, omega: List[complex]) -> np.ndarray:
+        mult = np.prod(1-np.conj(np.asarray(omega, dtype=np.complex128)))
+        return mult*self.evaluate(omega)
+
+    # The hermitian forms at a stack of points of shape (batch, colors)
+    def hermitian_forms(self, omegas: np.ndarray) -> np.ndarray:
+        omegas = np.asarray(omegas, dtype=np.complex128)
+        mult = np.prod(1-np.conj(omegas), axis=1)
+        weights = np.prod(omegas[:, None, :]**self.exps, axis=2)
+        forms = (mult[:, None]*weights) @ self.flat_tensor
+        return forms.reshape(len(omegas), self.size, self.size)
+
+    # The hermitian form at omega as an array of mpmath numbers, at the
+    # current mpmath precision. Each omega_j that rounds a root of unity
+    # is replaced by that root (see mp_unit), so the form is exact when
+    # all of them do.
+    def exact_hermitian_form(self, omega: List[complex]) -> np.ndarray:
+        w = [mp_unit(x) for x in omega]
+        mult = mp.fprod([1-mp.conj(x) for x in w])
+        weights = np.array([mult*mp.fprod([x**int(e) for x, e in
+            zip(w, exp)]) for exp in self.exps], dtype=object)
+        return np.tensordot(weights, self.tensor.astype(object), 1)
+
+    # Signature and nullity at omega without a cutoff on the eigenvalues,
+    # by certified_inertia. omega is taken as the rounding of the exact
+    # point, so each omega_j is only known to a few eps. When all of them
+    # round roots of unity, the exact hermitian form is known. Otherwise
+    # the eigenvalues within the error of omega stay undecided. At
+    # omega = (+-1, ..., +-1) the hermitian form is an integer matrix, so
+    # its nullity is computed exactly.
+    # eig_val are the eigenvalues of the hermitian form at omega, if the
+    # caller already has them, and nullity is the exact nullity, if the
+    # caller knows it. Returns (signature, nullity, certified).
+    def certified_signature(self, omega: List[complex],
+            eig_val: Optional[np.ndarray] = None,
+            nullity: Optional[int] = None) -> Tuple[int, int, bool]:
+        omega = np.asarray(omega, dtype=np.complex128)
+        colors = len(omega)
+        H = self.hermitian_form(omega)
+
+        # Rounding errors of the evaluation are a few eps per monomial.
+        # An error of a few eps in each omega_j moves the weight of the
+        # monomial t^e by |e| times that, and the factor
+        # (1-conj(w_0))...(1-conj(w_k)) by colors times that.
+        norms = np.linalg.norm(self.tensor.reshape(len(self.tensor), -1),
+            axis=1)
+        eval_err = 8*(len(self.exps) + 2)*float(
+            np.linalg.norm(np.abs(self.tensor).sum(axis=0)))
+        omega_err = 8*float(((np.abs(self.exps).sum(axis=1) + colors)
+            *norms).sum())
+        input_err = 2**colors*EPS*(eval_err + omega_err)
+
+        turns = [root_of_unity(w) for w in omega]
+        if(all([(t is not None) and (t.denominator <= 2) for t in turns])):
+            signs = np.array([1-2*t.numerator for t in turns])
+            if(1 in signs):
+                nullity = self.size
+            else:
+                weights = np.prod(signs**self.exps, axis=1)
+                nullity = self.size - integer_rank(
+                    np.tensordot(weights, self.tensor, 1))
 
-        M = copy.deepcopy(self.M)
-        variables = self.variables
+        exact_form = None
+        if(None not in turns):
+            exact_form = lambda: self.exact_hermitian_form(omega)
+        return certified_inertia(H, input_err, exact_form, nullity, eig_val)
 
-        if(M==Matrix([])):
-            return S(1)
+    def transpose(self) -> 'PolyMatrix':
+        return PolyMatrix(self.variables, self.tensor.transpose(0, 2, 1),
+            self.exps, self.backend)
 
-        n = shape(M)[0]
+    def __neg__(self) -> 'PolyMatrix':
+        return PolyMatrix(self.variables, -self.tensor, self.exps,
+            self.backend)
 
-        for k in range(n-1):
-            # Get non-zero pivots
-            if(M[k, k] == 0):
-                singular = True
-                for j in range(k+1, n):
-                    if(M[j, k] != 0):
-                        singular = False
-                        swap_rows(k, j, M)
-                if(singular):
-                    return S(0)
-
-            # Update matrix
-            for i in range(k+1, n):
-                for j in range(k+1, n):
-                    f = M[i, j]*M[k, k] - M[i, k]*M[k, j]
-                    f = Poly(f, variables)
-                    if(k==0):
-                        g = Poly(1, variables)
-                    else:
-                        g = M[k-1, k-1]
-                        g = Poly(g, variables)
-                    q, r = div(f, g, domain='ZZ')
-                    assert r == Poly(0, variables), "Not divisible"
-                    q = q.as_expr()
-                    M[i, j] = q
-
-        det = M[n-1, n-1]
+    # Key of the determinant in DET_CACHE. It only depends on the
+    # entries, not on the backend.
+    @cached_property
+    def cache_key(self) -> Tuple:
+        digest = hashlib.sha1()
+        digest.update(np.ascontiguousarray(self.exps).tobytes())
+        digest.update(np.ascontiguousarray(self.tensor).tobytes())
+        return (self.tensor.shape, self.exps.shape, digest.hexdigest())
+
+    # The determinant, by Bareiss algorithm or another backend
+    # The elimination runs on IntPolys built straight from the tensor,
+    # and only the determinant is converted back to SymPy.
+    # The backend only sees the diagonal blocks of the block-triangular
+    # form, in a fill-reducing order (see sparse_det.py).
+    @cached_property
+    def determinant(self) -> IntPoly:
+        key = self.cache_key
+        if(key in DET_CACHE):
+            DET_CACHE.move_to_end(key)
+            return DET_CACHE[key]
+
+        det = block_det(self.entries, len(self.variables),
+            DET_BACKENDS[self.backend])
+        DET_CACHE[key] = det
+        if(len(DET_CACHE) > DET_CACHE_SIZE):
+            DET_CACHE.popitem(last=False)
         return det
 
+    # The determinant as a SymPy expression
+    @cached_property
+    def bareiss_det(self) -> Add:
+        return self.determinant.as_expr(self.variables)
+
     # The Alexander polynomial without t_i's
     # Can have extra (t_i-1)'s'
     @cached_property
     def stripped_multivar_alexander_poly(self) -> Add:
-        f = copy.deepcopy(self.bareiss_det)
-        for var in self.variables:
-            divides = True
-            while(divides):
-                q, r = div(f.as_poly(), var)
-                if(r == Poly(0, self.variables)):
-                    f = q
+        f = LaurentPoly.from_poly(self.determinant)
+        return f.strip().as_expr(self.variables)
+
+    # The Conway potential function as a fraction of Laurent polynomials
+    # in lowest terms, (numerator, denominator). The denominator is a
+    # product of t_i's, (t_i-1)'s and (t_i+1)'s.
+    def conway_fraction(self, graph: SGraph
+            ) -> Tuple[LaurentPoly, LaurentPoly]:
+        nvars = len(self.variables)
+        one = LaurentPoly.constant(1, nvars)
+
+        # det(-M) = (-1)^n det(M), then t -> t^(-2), times (t0...tk)^n
+        f = LaurentPoly.from_poly(self.determinant)*(-1)**self.size
+        f = f.scale_exps(-2).shift((self.size,)*nvars)
+
+        # Factors (t_i-t_i^(-1))^(euler_char(i)-1), where
+        # t_i-t_i^(-1) = t_i^(-1)(t_i-1)(t_i+1)
+        denom = one
+        if(nvars != 1):
+            for i in range(nvars):
+                k = graph.euler_char(i)-1
+                t = LaurentPoly.monomial(i, 1, nvars)
+                factors = [t-one, t+one]
+                f = f*LaurentPoly.monomial(i, -k, nvars)
+                if(k >= 0):
+                    for g in factors:
+                        for j in range(k):
+                            f = f*g
                 else:
-                    divides = False
-        f = f.as_expr()
-        return f
-
-    # The Conway potential function
-    def conway_potential_function(self, graph: SGraph) -> Add:
-        M = copy.deepcopy(self.M)
-        variables = copy.deepcopy(self.variables)
-        f = PolyMatrix(variables, -M).bareiss_det
-
-        for var in variables:
-            f = f.subs(var, var**(-2))
+                    for g in factors:
+                        f, divided = f.divide_out(g, -k)
+                        for j in range(-k-divided):
+                            denom = denom*g
 
-        f = f*(prod(variables)**shape(self.M)[0])
+        # Negative powers of t_i go to the denominator
+        low = f.min_exps()
+        f = f.strip().shift(tuple([max(e, 0) for e in low]))
+        denom = denom.shift(tuple([max(-e, 0) for e in low]))
 
-        if(len(variables) != 1):
-            for i in range(len(variables)):
-                e = variables[i]
-                f = f*(e-e**(-1))**(graph.euler_char(i)-1)
+        return f*graph.clasp_sign, denom
 
-        cpf = (cancel(f)*graph.clasp_sign).as_expr()
-        return cpf
+    # The Conway potential function
+    def conway_potential_function(self, graph: SGraph) -> Add:
+        num, denom = self.conway_fraction(graph)
+        return num.as_expr(self.variables)/denom.as_expr(self.variables)
 
     # The multivariate Alexander polynomial
+    # The numerator of the Conway potential function, with t_i^2 -> t_i
     def multivar_alexander_poly(self, graph: SGraph):
-        cpf = self.conway_potential_function(graph)
-        if(graph.colors==1):
-            cancel(cpf*symbols("t0**2-1"))
-        cpf, denom = fraction(cpf)
-        for var in self.variables:
-            cpf = cpf.subs(var**2, var)
-        return cpf
-
-    # Computes the signature at a tuple of length 1 complex numbers
-    def signature(self, omega: List[complex]) -> int:
-        mult = 1 
-        for c in omega:
-            mult *= (1-c.conjugate())
-        print(mult)
-        M = copy.deepcopy(self.M)
-        for i in range(len(self.variables)):
-            M = M.subs(self.variables[i], omega[i])
-        M = np.array(mult*M, dtype='complex128')
-        eig_val, eig_vect = eigh(M)
-        print("M", M)
-        print("eigval", eig_val)
-        sgn = 0
-        for e in eig_val:
-            if(e>10**(-5.0)):
-                sgn += 1
-            elif(e<-10**(-5.0)):
-                sgn -= 1
-        return (sgn, eig_val)
- 
+        num, denom = self.conway_fraction(graph)
+        return num.halve_even_exps().as_expr(self.variables)
+
+    # Computes the signature and nullity at a tuple of length 1 complex
+    # numbers, by batch_inertia like the points of signature_grid
+    def signature(self, omega: List[complex]) -> Tuple[int, int]:
+        sgn, nullity = batch_inertia(self.hermitian_form(omega)[None])
+        return int(sgn[0]), int(nullity[0])
+
+    # Signatures and nullities at a whole array of points, of shape
+    # (..., colors), for example from torus_grid. The hermitian forms
+    # are built and diagonalized in batches of at most chunk entries.
+    # Returns two integer arrays of shape (...).
+    def signature_grid(self, omegas: np.ndarray, chunk: int = 2**22
+            ) -> Tuple[np.ndarray, np.ndarray]:
+        omegas = np.asarray(omegas, dtype=np.complex128)
+        shape = omegas.shape[:-1]
+        points = omegas.reshape(-1, omegas.shape[-1])
+        step = max(1, chunk//max(1, self.size**2))
+
+        sgn = np.zeros(len(points), dtype=np.int64)
+        nullity = np.zeros(len(points), dtype=np.int64)
+        for start in range(0, len(points), step):
+            forms = self.hermitian_forms(points[start:start+step])
+            sgn[start:start+step], nullity[start:start+step] = \
+                batch_inertia(forms)
+
+        return sgn.reshape(shape), nullity.reshape(shape)
+
+    # The Levine-Tristram signature of a one-variable matrix on the whole
+    # unit circle. The signature can only change where the determinant
+    # vanishes, so it is evaluated once inside each arc between such
+    # angles, and by certified_signature at each of them. The nullity at
+    # a root of the determinant is at least 1 and at most the multiplicity
+    # of the root, so it is exactly 1 at simple roots. At multiple roots
+    # the values are only numerical, and jump_certified is False.
+    def signature_function(self) -> SignatureFunction:
+        assert len(self.variables) == 1, "Only for one variable"
+        assert not self.determinant.is_zero(), "The determinant vanishes"
+
+        roots = unit_circle_roots({exp[0]: c for exp, c in
+            self.determinant.terms.items()})
+        jumps = [theta for theta, mult in roots]
+        ends = [0.0] + jumps + [2*np.pi]
+        mids = [(a+b)/2 for a, b in zip(ends[:-1], ends[1:])]
+        sgn, nullity = self.signature_grid(np.exp(1j*np.array(mids))[:, None])
+
+        values = [self.certified_signature([np.exp(1j*theta)],
+            nullity=1 if (mult == 1) else None) for theta, mult in roots]
+        return SignatureFunction(jumps, sgn.tolist(),
+            [v[0] for v in values], [v[1] for v in values],
+            [v[2] for v in values])
+
 
 # Computes the presentation matrix for the graph.
-def presentation_matrix(graph: SGraph) -> PolyMatrix:
+# backend picks the determinant algorithm, see DET_BACKENDS.
+def presentation_matrix(graph: SGraph, backend: str = "bareiss"
+        ) -> PolyMatrix:
 
-    pres = zeros(len(graph.hom_basis))
-    seif = ""
     variables = []
 
     # Initialize variables
@@ -142,66 +352,17 @@ def presentation_matrix(graph: SGraph) -> PolyMatrix:
         exec("""t{} = symbols("t{}")""".format(j, j))
         exec("variables.append(t{})".format(j), None, locals())
 
-    # Add the generalized Seifert matrix for each sign tuple.
-    for i in range(2**graph.colors):
-        col_lifts = [1]*graph.colors
-        mult = 1
-
-        tally = int(i)
-        for j in range(graph.colors):
-            if(tally %2 == 0):
-                mult = mult*variables[graph.colors-j-1]
-                col_lifts[graph.colors-j-1] = -1
-                tally /= 2
-            else:
-                tally = (tally-1)/2
-
-        sign = prod(col_lifts)
-
-        M = Matrix(graph.gen_seifert_matrix(col_lifts))
-        pres = pres + M*sign*mult
-        seif += str(col_lifts) + "\n" + str(M) + "\n\n"
+    # The generalized Seifert matrix for each sign tuple, with the sign
+    # and the monomial of the lowered colors.
+    gen_seifs = graph.gen_seifert_matrices()
+    lifts = np.array(lift_tuples(graph.colors), dtype=np.int64)
+    signs = np.prod(lifts, axis=1)
+    exps = (lifts == -1).astype(np.int64)
 
-    return ("Presentation Matrix\n" +\
-            str(pres) + "\n\n\nGeneralized Seifert Matrices\n\n" + seif,
-            PolyMatrix(variables, pres))
+    return PolyMatrix(variables, signs[:, None, None]*gen_seifs, exps,
+        backend)
 
 
 # Computes the presentation matrix for the graph.
 def create_seifert_matrices(graph: SGraph) -> str:
-
-    pres = zeros(len(graph.hom_basis))
-    seif = ""
-    variables = []
-
-    # Initialize variables
-    for j in range(graph.colors):
-        exec("""t{} = symbols("t{}")""".format(j, j))
-        exec("variables.append(t{})".format(j), None, locals())
-
-    # Add the generalized Seifert matrix for each sign tuple.
-    for i in range(2**graph.colors):
-        col_lifts = [1]*graph.colors
-        mult = 1
-
-        tally = int(i)
-        for j in range(graph.colors):
-            if(tally %2 == 0):
-                mult = mult*variables[graph.colors-j-1]
-                col_lifts[graph.colors-j-1] = -1
-                tally /= 2
-            else:
-                tally = (tally-1)/2
-
-        sign = prod(col_lifts)
-
-        M = Matrix(graph.gen_seifert_matrix(col_lifts))
-        pres = pres + M*sign*mult
-        seif += str(col_lifts) + "\n" + str(M) + "\n\n"
-
-    return "Presentation Matrix\n" +\
-            str(pres) + "\n\n\nGeneralized Seifert Matrices\n\n" + seif
-
-
-
-
+    return presentation_matrix(graph).describe()
@@ -1,8 +1,10 @@
 import math
+import numpy as np
 from typing import List, Tuple, Callable, Dict, Set
 from functools import cached_property
 from dataclasses import dataclass
 from copy import deepcopy
+from heapq import heapify, heappush, heappop
 
 """
 ----- Generates the homology basis for a spline graph and
@@ -63,6 +65,113 @@ def find_path(verti: Set, edges_col: Set, edge_dict: Dict,
                 explored.append(v)
 
 
+# Finds the edges left after deleting redundant pairs of edges
+# in the same order as repeated calls of SGraph.delete_redundant_pair,
+# but in a single pass that costs O(E log E).
+# Edges are the indices of typ. vertex_lists has the list of edges at
+# each vertex, in the order of the vertices, and pair_lists has the list
+# of edges between each pair of vertices, in the order that
+# delete_redundant_pair visits the pairs.
+# Returns whether each edge is kept.
+def cancel_redundant_pairs(typ: List[int], vertex_lists: List[List[int]],
+        pair_lists: List[List[int]]) -> List[bool]:
+
+    m = len(typ)
+    alive = [True]*m
+
+    # Linked lists for the edges at each vertex. The node 2*e is the edge e
+    # at its first vertex and 2*e+1 is the edge e at its second vertex.
+    v_next = [-1]*(2*m)
+    v_prev = [-1]*(2*m)
+    side = [0]*m
+    for lst in vertex_lists:
+        last = -1
+        for e in lst:
+            node = 2*e + side[e]
+            side[e] = 1
+            v_prev[node] = last
+            if(last != -1):
+                v_next[last] = node
+            last = node
+
+    # Linked lists for the edges between each pair of vertices
+    p_next = [-1]*m
+    p_prev = [-1]*m
+    pair_of = [0]*m
+    pos = [0]*m
+    heap = []
+    for k, lst in enumerate(pair_lists):
+        for j, e in enumerate(lst):
+            pair_of[e] = k
+            pos[e] = j
+            if(j > 0):
+                p_prev[e] = lst[j-1]
+                p_next[lst[j-1]] = e
+                if(typ[lst[j-1]] == -typ[e]):
+                    heap.append((k, j-1, lst[j-1]))
+    heapify(heap)
+
+    # Candidates are consecutive edges between the same pair with opposite
+    # types, ordered like the scan in delete_redundant_pair. Whether they
+    # are also consecutive at both vertices is checked when they come up.
+    def push(a: int, b: int):
+        if((a != -1) and (b != -1) and (p_next[a] == b) and
+        (typ[a] == -typ[b])):
+            heappush(heap, (pair_of[a], pos[a], a))
+
+    # The wrap-around check of delete_redundant_pair (last edge, first edge)
+    # never applies: the edges between a pair are in the same order in
+    # vve as at both vertices, so the first cannot follow the last.
+    while(heap):
+        k, j, a = heappop(heap)
+        b = p_next[a]
+        if((not alive[a]) or (b == -1) or (v_next[2*a] != 2*b) or
+        (v_next[2*a+1] != 2*b+1)):
+            continue
+
+        alive[a] = False
+        alive[b] = False
+
+        new_pairs = []
+        for s in range(2):
+            before = v_prev[2*a+s]
+            after = v_next[2*b+s]
+            if(before != -1):
+                v_next[before] = after
+            if(after != -1):
+                v_prev[after] = before
+            if((before != -1) and (after != -1)):
+                new_pairs.append((before//2, after//2))
+
+        before = p_prev[a]
+        after = p_next[b]
+        if(before != -1):
+            p_next[before] = after
+        if(after != -1):
+            p_prev[after] = before
+        new_pairs.append((before, after))
+
+        for (e1, e2) in new_pairs:
+            push(e1, e2)
+
+    return alive
+
+
+# The lifts of the colors for all 2^colors generalized Seifert matrices,
+# in the order used by presentation_matrix: the i-th lift lowers
+# the color colors-j-1 exactly when bit j of i is 0.
+def lift_tuples(colors: int) -> List[List[int]]:
+    lifts = []
+    for i in range(2**colors):
+        col_lifts = [1]*colors
+        for j in range(colors):
+            if((i >> j) % 2 == 0):
+                col_lifts[colors-j-1] = -1
+        lifts.append(col_lifts)
+
+    return lifts
+
+
 # Class for vertices
 @dataclass(frozen=True, repr=False)
 class SVertex:
@@ -74,6 +183,7 @@ class SVertex:
 
 
 # Class for edges
+# eid is an id that is unique among the edges of an SGraph.
 @dataclass(frozen=True, repr=False)
 class SEdge:
     initial: SVertex
@@ -81,6 +191,7 @@ class SEdge:
     num: int
     typ: int
     col: int
+    eid: int = -1
 
     def __repr__(self):
         return "E({}, {}, {}, {}, {})".format(self.initial,
@@ -99,6 +210,7 @@ class OEdge():
         self.num = edge.num
         self.typ = edge.typ
         self.col = edge.col
+        self.eid = edge.eid
         self.sign = sign
 
     def __repr__(self):
@@ -124,7 +236,8 @@ class OEdge():
     # Returns the SEdge corresponding to an oriented edge
     @cached_property
     def edge(self):
-        return SEdge(self.initial, self.terminal, self.num, self.typ, self.col)
+        return SEdge(self.initial, self.terminal, self.num, self.typ,
+            self.col, self.eid)
 
 
 # Checks if a list of edges forms a loop.
@@ -147,6 +260,7 @@ class Loop:
 
 
 # Class for spline graphs of clasp complexes
+# vve is sparse: only pairs of vertices with edges between them are keys.
 @dataclass
 class SGraph:
     vert: List[SVertex]
@@ -156,79 +270,128 @@ class SGraph:
     colors: int
     col_signs: List[int]
 
+    # edge_rank maps edge ids to increasing numbers along self.edges.
+    # Deleting an edge leaves the ranks of the other edges valid,
+    # so the order of two edges is an O(1) lookup.
+    def __post_init__(self):
+        self.edge_rank = {edge.eid: i for i, edge in enumerate(self.edges)}
+        self.next_rank = len(self.edges)
+        self.next_eid = max(self.edge_rank, default=-1)+1
+
+    # Gives a new edge the next id and puts it at the end of the order.
+    def new_edge(self, init: SVertex, term: SVertex,
+                 typ: int, col: int) -> SEdge:
+        new_edge = SEdge(init, term, len(self.pair_edges(init, term)),
+            typ, col, self.next_eid)
+        self.edge_rank[new_edge.eid] = self.next_rank
+        self.next_eid += 1
+        self.next_rank += 1
+        return new_edge
+
     """
 
     ------- Tools for making the final spline graph ------
 
     """
 
+    # The edges between two vertices.
+    # Pairs without edges are not stored, so this may be a new empty list.
+    def pair_edges(self, init: SVertex, term: SVertex) -> List[SEdge]:
+        return self.vve.get((init, term), [])
+
     # Add a new edge to the front of the graph.
     def add_edge(self, init: SVertex, term: SVertex,
                  typ: int, col: int):
     
-        new_edge = SEdge(init, term, len(self.vve[(init, term)]), typ, col)
+        new_edge = self.new_edge(init, term, typ, col)
 
-        self.edges += [new_edge]
-        self.vve[(init, term)] = self.vve[(init, term)] + [new_edge]
-        self.ve[init] = self.ve[init] + [new_edge]
-        self.ve[term] = self.ve[term] + [new_edge]
+        self.edges.append(new_edge)
+        self.vve.setdefault((init, term), []).append(new_edge)
+        self.ve[init].append(new_edge)
+        self.ve[term].append(new_edge)
 
     # Add a new edge to the back of the graph.
     def add_init_edge(self, init: SVertex, term: SVertex,
                  typ: int, col: int):
     
-        new_edge = SEdge(init, term, len(self.vve[(init, term)]), typ, col)
+        new_edge = self.new_edge(init, term, typ, col)
 
-        self.edges += [new_edge]
-        self.vve[(init, term)] = [new_edge] + self.vve[(init, term)]
+        self.edges.append(new_edge)
+        self.vve[(init, term)] = [new_edge] + self.pair_edges(init, term)
         self.ve[init] = [new_edge] + self.ve[init]
         self.ve[term] = [new_edge] + self.ve[term]
 
     # Deletes an edge from the graph
     def delete_edge(self, edge: SEdge):
+        pair = (edge.initial, edge.terminal)
         self.edges.remove(edge)
-        self.vve[(edge.initial, edge.terminal)].remove(edge)
+        self.vve[pair].remove(edge)
+        if(self.vve[pair] == []):
+            del self.vve[pair]
         self.ve[edge.initial].remove(edge)
         self.ve[edge.terminal].remove(edge)
+        del self.edge_rank[edge.eid]
 
     # Finds and deletes a redundant pair of edges in the graph
     def delete_redundant_pair(self) -> bool:
         exists = False
-        for i1 in range(len(self.vert)):
-            for i2 in range(i1+1, len(self.vert)):
-                v1 = self.vert[i1]
-                v2 = self.vert[i2]
-                vv_edges = self.vve[(v1, v2)]
-                v1_edges = self.ve[v1]
-                v2_edges = self.ve[v2]
-                for j in range(len(vv_edges)-1):
-                    edge1 = vv_edges[j]
-                    edge2 = vv_edges[j+1]
-                    if((edge1.typ == -edge2.typ) and
-                        (v2_edges.index(edge2) == v2_edges.index(edge1)+1)
-                    and (v1_edges.index(edge2) == v1_edges.index(edge1)+1)):
-                        self.delete_edge(edge1)
-                        self.delete_edge(edge2)
-                        exists = True
-                        return exists
-                if(len(vv_edges)>=2):
-                    edge1 = vv_edges[-1]
-                    edge2 = vv_edges[0]
-                    if((edge1.typ == -edge2.typ) and
-                        (v2_edges.index(edge2) == v2_edges.index(edge1)+1)
-                    and (v1_edges.index(edge2) == v1_edges.index(edge1)+1)):
-                        self.delete_edge(edge1)
-                        self.delete_edge(edge2)
-                        exists = True
-                        return exists
+        vert_ind = {v: i for i, v in enumerate(self.vert)}
+        pairs = sorted(self.vve,
+            key=lambda pair: (vert_ind[pair[0]], vert_ind[pair[1]]))
+        for (v1, v2) in pairs:
+            vv_edges = self.vve[(v1, v2)]
+            v1_edges = self.ve[v1]
+            v2_edges = self.ve[v2]
+            for j in range(len(vv_edges)-1):
+                edge1 = vv_edges[j]
+                edge2 = vv_edges[j+1]
+                if((edge1.typ == -edge2.typ) and
+                    (v2_edges.index(edge2) == v2_edges.index(edge1)+1)
+                and (v1_edges.index(edge2) == v1_edges.index(edge1)+1)):
+                    self.delete_edge(edge1)
+                    self.delete_edge(edge2)
+                    exists = True
+                    return exists
+            if(len(vv_edges)>=2):
+                edge1 = vv_edges[-1]
+                edge2 = vv_edges[0]
+                if((edge1.typ == -edge2.typ) and
+                    (v2_edges.index(edge2) == v2_edges.index(edge1)+1)
+                and (v1_edges.index(edge2) == v1_edges.index(edge1)+1)):
+                    self.delete_edge(edge1)
+                    self.delete_edge(edge2)
+                    exists = True
+                    return exists
 
         return exists
 
     # Cleans up redundant pairs of edges.
+    # Deletes the same edges as calling delete_redundant_pair until
+    # there are none left.
     def clean_graph(self):
-        exists = True
-        while(exists):
-            exists = self.delete_redundant_pair()
+        ind = {edge.eid: i for i, edge in enumerate(self.edges)}
+        vert_ind = {v: i for i, v in enumerate(self.vert)}
+        pairs = sorted(self.vve,
+            key=lambda pair: (vert_ind[pair[0]], vert_ind[pair[1]]))
+
+        keep = cancel_redundant_pairs([edge.typ for edge in self.edges],
+            [[ind[edge.eid] for edge in self.ve[v]] for v in self.vert],
+            [[ind[edge.eid] for edge in self.vve[pair]] for pair in pairs])
+
+        for edge, kept in zip(self.edges, keep):
+            if(not kept):
+                del self.edge_rank[edge.eid]
+        self.edges = [edge for edge in self.edges
+            if edge.eid in self.edge_rank]
+
+        for v in self.vert:
+            self.ve[v] = [edge for edge in self.ve[v]
+                if edge.eid in self.edge_rank]
+        for pair in pairs:
+            self.vve[pair] = [edge for edge in self.vve[pair]
+                if edge.eid in self.edge_rank]
+            if(self.vve[pair] == []):
+                del self.vve[pair]
 
     # Prints the abstract data of the graph
     # List of vertex indices, then edges = (init, term, type)
@@ -263,7 +426,7 @@ class SGraph:
             v0 = vert[0]
             v1 = vert[1]
             if(v0.col == v1.col):
-                if(self.vve[(v0, v1)] == []):
+                if((v0, v1) not in self.vve):
                     self.add_edge(v0, v1, 1, v0.col)
                     self.add_edge(v0, v1, -1, v0.col)
             vert = vert[1:]
@@ -271,17 +434,10 @@ class SGraph:
     # Checks if two colors are connected.
     # The lower color should be the first input.
     def check_connected(self, col1: int, col2: int) -> bool:
-        connected = False
-        i = 0
-        while((not connected) and (i<len(self.vert))):
-            if(self.vert[i].col == col1):
-                for v2 in self.vert:
-                    if((v2.col == col2) and
-                    (self.vve[(self.vert[i], v2)] != [])):
-                        connected = True
-                        break
-            i+=1
-        return connected
+        for (v1, v2) in self.vve:
+            if((v1.col == col1) and (v2.col == col2)):
+                return True
+        return False
 
     # Makes sure the graph across colors is complete
     def make_complete(self):
@@ -290,7 +446,7 @@ class SGraph:
         for color1 in range(len(v_col)):
             for color2 in range(len(v_col)):
                 if((color1 < color2) and
-                    (self.vve[(v_col[color1], v_col[color2])] == []) and
+                    ((v_col[color1], v_col[color2]) not in self.vve) and
                 (not self.check_connected(color1, color2))):
                     self.add_edge(v_col[color1], v_col[color2], 2, color1)
                     self.add_edge(v_col[color1], v_col[color2], -2, color1)
@@ -363,7 +519,7 @@ class SGraph:
             v1 = self.vert[i]
             v2 = self.vert[i+1]
             m_edge = OEdge(self.max_edge(v1, v2), -1)
-            for edge in self.vve[(v1, v2)][:-1]:
+            for edge in self.pair_edges(v1, v2)[:-1]:
                 o_edge = OEdge(edge, 1)
 
                 hom_basis.append(Loop([o_edge, m_edge]))
@@ -571,7 +727,7 @@ class SGraph:
 
         link = 0
 
-        if(self.edges.index(edge1.edge) < self.edges.index(edge2.edge)):
+        if(self.edge_rank[edge1.eid] < self.edge_rank[edge2.eid]):
             pos = 1
         else:
             pos = 0
@@ -588,7 +744,7 @@ class SGraph:
 
         if((val_v1 < val_u1 < val_v2 < val_u2) or
         (val_u1 < val_v1 < val_u2 < val_v2)):
-            if(edge1.edge == edge2.edge):
+            if(edge1.eid == edge2.eid):
                 link = [[1, 0], [0, -1]][up_down][handed]
             else:
                 if(val_v1 < val_u1 < val_v2 < val_u2):
@@ -597,7 +753,7 @@ class SGraph:
                     link = -pos
 
         # print(edge1, edge2, link*edge1.sign*edge2.sign,
-        #    self.edges.index(edge1.edge), self.edges.index(edge2.edge))
+        #    self.edge_rank[edge1.eid], self.edge_rank[edge2.eid])
     
         return link*edge1.sign*edge2.sign
 
@@ -613,18 +769,289 @@ class SGraph:
 
         return link
 
-    # Computes the generalized Seifert matrix for a given lifting.
-    def gen_seifert_matrix(self, col_lifts: List[int]) -> List[List[int]]:
-        n = len(self.hom_basis)
+    # For each loop in the homology basis, the indices (in self.edges)
+    # of the edges it runs along, and the signed number of times it does.
+    @cached_property
+    def loop_edges(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        ind = {edge.eid: e for e, edge in enumerate(self.edges)}
+        loop_edges = []
+
+        for loop in self.hom_basis:
+            count = {}
+            for o_edge in loop.edges:
+                e = ind[o_edge.eid]
+                count[e] = count.get(e, 0) + o_edge.sign
+            edges = sorted(e for e in count if count[e] != 0)
+            loop_edges.append((np.array(edges, dtype=np.int64),
+                np.array([count[e] for e in edges], dtype=np.int64)))
+
+        return loop_edges
+
+    # Signed incidence matrix of the homology basis against the edges.
+    # Entry (i, e) adds up the signs of the times that the loop
+    # hom_basis[i] runs along the edge self.edges[e].
+    @cached_property
+    def loop_edge_incidence(self) -> np.ndarray:
+        inc = np.zeros((len(self.hom_basis), len(self.edges)), dtype=np.int64)
+
+        for i, (edges, signs) in enumerate(self.loop_edges):
+            inc[i, edges] = signs
+
+        return inc
+
+    # The loop-edge incidence as flat arrays (loops, edges, signs), sorted
+    # by loop: loop hom_basis[loops[k]] runs signs[k] times along the edge
+    # self.edges[edges[k]].
+    @cached_property
+    def loop_entries(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        loops = self.loop_edges
+        empty = [np.zeros(0, dtype=np.int64)]
+        return (np.repeat(np.arange(len(loops)),
+                [len(edges) for edges, signs in loops]),
+            np.concatenate([edges for edges, signs in loops] + empty),
+            np.concatenate([signs for edges, signs in loops] + empty))
+
+    # Computes inc @ mat for the loop-edge incidence inc, adding up rows of
+    # mat along each loop. Loops only run along a few edges each, so this
+    # is much cheaper than a dense integer matmul.
+    # With start, the rows of mat are only those of the edges from start
+    # on, and the other edges are left out. The sum goes into out, if
+    # given, and the rows of mat are gathered at most chunk numbers at a
+    # time, so the memory used stays bounded.
+    def loop_combination(self, mat: np.ndarray, start: int = 0,
+            out: np.ndarray = None, chunk: int = 2**22) -> np.ndarray:
+        loops, edges, signs = self.loop_entries
+        if((start != 0) or (len(mat) != len(self.edges))):
+            used = (edges >= start) & (edges < start+len(mat))
+            loops, edges, signs = loops[used], edges[used]-start, signs[used]
+
+        if(out is None):
+            out = np.zeros((len(self.loop_edges),) + mat.shape[1:],
+                dtype=np.int64)
+        step = max(1, chunk//max(1, int(np.prod(mat.shape[1:]))))
+        for k in range(0, len(edges), step):
+            part = loops[k:k+step]
+            vals = mat[edges[k:k+step]].astype(np.int64)*signs[k:k+step
+                ].reshape((-1,) + (1,)*(mat.ndim-1))
+
+            # The entries are sorted by loop, so each loop's rows are a
+            # contiguous run that reduceat adds up
+            first = np.flatnonzero(np.diff(part, prepend=-1))
+            out[part[first]] += np.add.reduceat(vals, first, axis=0)
+        return out
+
+    # Table of edge_link over all pairs of edges, both positively oriented.
+    # Entry (e1, e2) is the contribution of self.edges[e1] (lifted)
+    # and self.edges[e2]. Vertex values are doubled to stay integers.
+    def edge_link_matrix(self, col_lifts: List[int]) -> np.ndarray:
+        lift = np.array([self.col_signs[c]*col_lifts[c]
+            for c in range(self.colors)], dtype=np.int64)
+
+        return self.edge_link_table(lift[self.edge_cols[0]],
+            lift[self.edge_cols[1]])
+
+    # Vertex nums of the initial and terminal vertices of the edges
+    @cached_property
+    def edge_nums(self) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.array([e.initial.num for e in self.edges], dtype=np.int64),
+            np.array([e.terminal.num for e in self.edges], dtype=np.int64))
+
+    # Colors of the initial and terminal vertices of the edges
+    @cached_property
+    def edge_cols(self) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.array([e.initial.col for e in self.edges], dtype=np.int64),
+            np.array([e.terminal.col for e in self.edges], dtype=np.int64))
 
-        gen_seif = [list(range(n)) for i in range(n)]
+    # Types of the edges
+    @cached_property
+    def edge_typs(self) -> np.ndarray:
+        return np.array([e.typ for e in self.edges], dtype=np.int64)
+
+    # The edge_link table given the direction (+1 or -1) in which the
+    # initial and terminal vertex of each lifted edge is pushed off.
+    # rows and cols pick out a block of the table (default: all edges).
+    # The entries are -1, 0 or 1, so the table is an int8 array.
+    def edge_link_table(self, init_lift: np.ndarray, term_lift: np.ndarray,
+            rows: np.ndarray = None, cols: np.ndarray = None) -> np.ndarray:
+        init_num, term_num = self.edge_nums
+        if(rows is None):
+            rows = np.arange(len(self.edges))
+        if(cols is None):
+            cols = np.arange(len(self.edges))
+
+        val_u1 = (2*init_num + init_lift)[rows][:, None]
+        val_u2 = (2*term_num + term_lift)[rows][:, None]
+        val_v1 = (2*init_num)[cols][None, :]
+        val_v2 = (2*term_num)[cols][None, :]
+
+        # The edges in self.edges are in the order of edge_rank
+        pos = rows[:, None] < cols[None, :]
+
+        left = (val_v1 < val_u1) & (val_u1 < val_v2) & (val_v2 < val_u2)
+        right = (val_u1 < val_v1) & (val_v1 < val_u2) & (val_u2 < val_v2)
+        link = (pos & left).view(np.int8) - (pos & right).view(np.int8)
+
+        # An edge linking with its own lift
+        i, j = np.nonzero(rows[:, None] == cols[None, :])
+        up_down = (init_lift[rows[i]] != 1).astype(np.int64)
+        handed = (self.edge_typs[rows[i]] <= 0).astype(np.int64)
+        self_link = np.array([[1, 0], [0, -1]], dtype=np.int8)
+        link[i, j] = self_link[up_down, handed]*(left[i, j] | right[i, j])
 
-        for i in range(n):
-            for j in range(n):
-                gen_seif[i][j] = self.linking_number(self.hom_basis[i],
-                                            self.hom_basis[j], col_lifts)
+        return link
 
-        return gen_seif
+    # Computes the generalized Seifert matrix for a given lifting.
+    # Linking is bilinear in the edges, so this is inc * link * inc^T
+    # for the loop-edge incidence and the edge linking table.
+    def gen_seifert_matrix(self, col_lifts: List[int]) -> List[List[int]]:
+        link = self.edge_link_matrix(col_lifts)
+        gen_seif = self.loop_combination(self.loop_combination(link).T).T
+
+        return gen_seif.tolist()
+
+    # The generalized Seifert matrices for every lift in lift_tuples,
+    # as an integer array of shape (2^colors, n, n).
+    # An edge only sees the lifts of its own two colors, so the edge
+    # linking table is computed for each of the four ways of pushing off
+    # the ends of an edge, and each lift picks its rows from those.
+    # The tables go by blocks of rows of at most chunk entries, each one
+    # combined along the loops and added to the matrices right away, so
+    # the memory used on top of the result stays bounded.
+    # Flipping every lift transposes the matrix, so with symmetric=True
+    # only the first half of the lifts is computed and the second half
+    # (the opposite lifts, in reverse order) is filled in by transposing.
+    def gen_seifert_matrices(self, symmetric: bool = True,
+            chunk: int = 2**22) -> np.ndarray:
+        n = len(self.hom_basis)
+        m = len(self.edges)
+        lifts = np.array(lift_tuples(self.colors), dtype=np.int64)
+        signs = np.array(self.col_signs, dtype=np.int64)
+        pushoffs = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+        gen_seifs = np.zeros((len(lifts), n, n), dtype=np.int64)
+        if(symmetric and (len(lifts) > 1)):
+            computed = range(len(lifts)//2)
+        else:
+            computed = range(len(lifts))
+
+        # Which of the pushoffs each computed lift uses at each edge
+        init_col, term_col = self.edge_cols
+        which = [2*(lift[init_col] == -1) + (lift[term_col] == -1)
+            for lift in signs*lifts[list(computed)]]
+
+        step = max(1, chunk//max(1, m, n))
+        for start in range(0, m, step):
+            rows = np.arange(start, min(m, start+step))
+
+            # partial[k] = rows of link table * inc^T for the k-th pushoff
+            partial = np.stack([self.loop_combination(self.edge_link_table(
+                np.full(m, a), np.full(m, b), rows).T, chunk=chunk).T
+                for a, b in pushoffs])
+
+            for i, k in zip(computed, which):
+                self.loop_combination(partial[k[rows], rows-start], start,
+                    gen_seifs[i], chunk)
+
+        if(symmetric and (len(lifts) > 1)):
+            for i in computed:
+                gen_seifs[len(lifts)-1-i] = gen_seifs[i].T
+
+        return gen_seifs
+
+    # The block of the loop-edge incidence matrix with the given (sorted)
+    # loops as rows and the given (sorted) edges as columns, as floats.
+    def incidence_block(self, loops: np.ndarray,
+            edges: np.ndarray) -> np.ndarray:
+        entry_loops, entry_edges, signs = self.loop_entries
+        row = np.searchsorted(loops, entry_loops)
+        col = np.searchsorted(edges, entry_edges)
+        found = (row < len(loops)) & (col < len(edges))
+        found[found] = (loops[row[found]] == entry_loops[found]) & \
+            (edges[col[found]] == entry_edges[found])
+
+        block = np.zeros((len(loops), len(edges)))
+        block[row[found], col[found]] = signs[found]
+        return block
+
+    # The generalized Seifert matrix for a given lifting in COO form:
+    # entry (rows[k], cols[k]) of the n x n matrix is data[k].
+    # Two edges only link if their vertex values interleave, so two loops
+    # only link if their vertex spans overlap, and an edge only links with
+    # edges further right (or itself). Loops are indexed by their spans:
+    # sorted by the width of the span, in powers of 2, and then by where it
+    # starts, and cut into chunks of at most chunk loops of the same width
+    # whose starts are within that width of each other. So a chunk spans
+    # at most three times its widest loop, and is only paired with the
+    # loops (and edges) whose vertex span overlaps it and which reach at
+    # least as far right as the chunk begins. The blocks are multiplied in
+    # floating point, where their small integer entries are exact.
+    def sparse_seifert_matrix(self, col_lifts: List[int], chunk: int = 64) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lift = np.array([self.col_signs[c]*col_lifts[c]
+            for c in range(self.colors)], dtype=np.int64)
+        init_lift = lift[self.edge_cols[0]]
+        term_lift = lift[self.edge_cols[1]]
+
+        init_num, term_num = self.edge_nums
+        low = np.minimum(init_num, term_num)
+        high = np.maximum(init_num, term_num)
+
+        # Vertex span and edge position span of each loop with edges
+        entry_loops, entry_edges, signs = self.loop_entries
+        counts = np.bincount(entry_loops, minlength=len(self.loop_edges))
+        loops = np.flatnonzero(counts)
+        offsets = (np.cumsum(counts) - counts)[loops]
+        v_min = np.minimum.reduceat(low[entry_edges], offsets)
+        v_max = np.maximum.reduceat(high[entry_edges], offsets)
+        p_min = np.minimum.reduceat(entry_edges, offsets)
+        p_max = np.maximum.reduceat(entry_edges, offsets)
+
+        width = np.array([int(w).bit_length() for w in v_max - v_min],
+            dtype=np.int64)
+        order = np.lexsort((v_min, width)).tolist()
+        chunks = []
+        for k in order:
+            if((not chunks) or (len(chunks[-1]) == chunk) or
+            (width[k] != width[chunks[-1][0]]) or
+            (v_min[k] > v_min[chunks[-1][0]] + 2**width[k])):
+                chunks.append([])
+            chunks[-1].append(k)
+
+        rows, cols, data = [], [], []
+        for part in chunks:
+            part = np.sort(np.array(part, dtype=np.int64))
+            lo = v_min[part].min()
+            hi = v_max[part].max()
+            first = p_min[part].min()
+
+            cand = np.flatnonzero((v_min <= hi) & (v_max >= lo) &
+                (p_max >= first))
+
+            # Edges of the chunk, and edges of the candidates that can link
+            # with them
+            in_part = np.zeros(len(self.loop_edges), dtype=bool)
+            in_part[loops[part]] = True
+            row_edges = np.unique(entry_edges[in_part[entry_loops]])
+            in_cand = np.zeros(len(self.loop_edges), dtype=bool)
+            in_cand[loops[cand]] = True
+            near = np.unique(entry_edges[in_cand[entry_loops] &
+                (high[entry_edges] >= lo) & (low[entry_edges] <= hi) &
+                (entry_edges >= first)])
+
+            block = self.edge_link_table(init_lift, term_lift,
+                row_edges, near)
+            vals = np.rint(self.incidence_block(loops[part], row_edges) @
+                block @ self.incidence_block(loops[cand], near).T
+                ).astype(np.int64)
+
+            r, c = np.nonzero(vals)
+            rows.append(loops[part][r])
+            cols.append(loops[cand][c])
+            data.append(vals[r, c])
+
+        empty = [np.zeros(0, dtype=np.int64)]
+        return (np.concatenate(rows + empty), np.concatenate(cols + empty),
+            np.concatenate(data + empty))
 
     # Euler characteristic of deletions
     def euler_char(self, i: int) -> int:
@@ -0,0 +1,334 @@
+from typing import List, Tuple, Callable, Optional
+from collections import deque
+from functools import partial
+from int_poly import *
+
+"""
+----- Structure-aware determinants of sparse polynomial matrices.
+----- Unit entries are eliminated first, what is left is split into the
+----- diagonal blocks of its block-triangular form, and each block is
+----- reordered with Markowitz pivoting to limit fill-in before its
+----- determinant is computed.
+"""
+
+
+# Sign of a permutation given as a list of images
+def perm_sign(perm: List[int]) -> int:
+    seen = [False]*len(perm)
+    sign = 1
+    for i in range(len(perm)):
+        if(seen[i]):
+            continue
+        j = i
+        length = 0
+        while(not seen[j]):
+            seen[j] = True
+            j = perm[j]
+            length += 1
+        if(length % 2 == 0):
+            sign = -sign
+    return sign
+
+
+# Perfect matching of rows to columns in the sparsity pattern, by
+# breadth-first augmenting paths. adj[i] is the list of columns with
+# non-zero entries in row i. Returns the column matched to each row,
+# or None if the matrix is structurally singular.
+def perfect_matching(adj: List[List[int]]) -> Optional[List[int]]:
+    n = len(adj)
+    col_of_row = [-1]*n
+    row_of_col = [-1]*n
+
+    for r in range(n):
+        parent = {}
+        queue = deque([r])
+        found = -1
+        while(queue and (found == -1)):
+            i = queue.popleft()
+            for j in adj[i]:
+                if(j not in parent):
+                    parent[j] = i
+                    if(row_of_col[j] == -1):
+                        found = j
+                        break
+                    queue.append(row_of_col[j])
+        if(found == -1):
+            return None
+
+        # Flip the augmenting path
+        j = found
+        while(j != -1):
+            i = parent[j]
+            next_j = col_of_row[i]
+            col_of_row[i] = j
+            row_of_col[j] = i
+            j = next_j
+
+    return col_of_row
+
+
+# Strongly connected components of a directed graph (Tarjan's algorithm,
+# without recursion). Components come out in reverse topological order.
+def strong_components(adj: List[List[int]]) -> List[List[int]]:
+    n = len(adj)
+    index = [-1]*n
+    low = [0]*n
+    on_stack = [False]*n
+    stack = []
+    comps = []
+    count = 0
+
+    for root in range(n):
+        if(index[root] != -1):
+            continue
+        work = [(root, 0)]
+        while(work):
+            v, k = work.pop()
+            if(k == 0):
+                index[v] = count
+                low[v] = count
+                count += 1
+                stack.append(v)
+                on_stack[v] = True
+            elif(k <= len(adj[v])):
+                low[v] = min(low[v], low[adj[v][k-1]])
+
+            # Next unvisited neighbour
+            while((k < len(adj[v])) and (index[adj[v][k]] != -1)):
+                w = adj[v][k]
+                if(on_stack[w]):
+                    low[v] = min(low[v], index[w])
+                k += 1
+
+            if(k < len(adj[v])):
+                work.append((v, k+1))
+                work.append((adj[v][k], 0))
+            elif(low[v] == index[v]):
+                comp = []
+                w = -1
+                while(w != v):
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp.append(w)
+                comps.append(comp)
+
+    return comps
+
+
+# Markowitz pivot order of a square sparsity pattern.
+# At each step the pivot (i, j) minimises (r_i-1)(c_j-1), where r_i and c_j
+# count the non-zeros left in its row and column, and the fill-in of the
+# elimination is added to the pattern. Returns the row and column orders.
+def markowitz_order(adj: List[List[int]]) -> Tuple[List[int], List[int]]:
+    n = len(adj)
+    rows = [set(a) for a in adj]
+    cols = [set() for j in range(n)]
+    for i in range(n):
+        for j in rows[i]:
+            cols[j].add(i)
+
+    row_order = []
+    col_order = []
+    left = set(range(n))
+    while(left):
+        best = None
+        for i in left:
+            for j in rows[i]:
+                cost = (len(rows[i])-1)*(len(cols[j])-1)
+                if((best is None) or (cost < best[0])):
+                    best = (cost, i, j)
+            if(best is not None and best[0] == 0):
+                break
+        if(best is None):
+            # No structural non-zeros left, so the order does not matter
+            row_order += sorted(left)
+            col_order += sorted(set(range(n)) - set(col_order))
+            break
+
+        cost, r, c = best
+        row_order.append(r)
+        col_order.append(c)
+        left.remove(r)
+
+        # Symbolic elimination of column c with row r
+        for i in cols[c]:
+            if(i == r):
+                continue
+            rows[i].discard(c)
+            for j in rows[r]:
+                if((j != c) and (j not in rows[i])):
+                    rows[i].add(j)
+                    cols[j].add(i)
+        for j in rows[r]:
+            cols[j].discard(r)
+        cols[c] = set()
+        rows[r] = set()
+
+    return row_order, col_order
+
+
+# Multiplies a polynomial by t^exp. Negative exponents are allowed,
+# and give Laurent polynomials in the same IntPoly form.
+def shift_poly(f: IntPoly, exp: Tuple[int, ...]) -> IntPoly:
+    return IntPoly({tuple([a+b for a, b in zip(e, exp)]): c
+        for e, c in f.terms.items()}, f.nvars)
+
+
+# Exponents of the largest monomial dividing all of the polynomials
+def monomial_content(polys: List[IntPoly], nvars: int) -> Tuple[int, ...]:
+    return tuple([min([e[v] for f in polys for e in f.terms], default=0)
+        for v in range(nvars)])
+
+
+# Checks if a polynomial is a unit of Z[t0^(+-1), ..., tk^(+-1)],
+# that is, plus or minus a monomial
+def is_unit(f: IntPoly) -> bool:
+    return (len(f.terms) == 1) and (abs(next(iter(f.terms.values()))) == 1)
+
+
+# Shrinks a square matrix before any determinant work. Rows and columns
+# with a single non-zero entry are split off, and entries that are
+# plus or minus a monomial are used as pivots to clear their columns.
+# Elimination runs over Laurent polynomials, and at the end the monomial
+# content of every row and column left is taken out, so the rest is a
+# polynomial matrix of low degree.
+# Returns (factor, shift, rest) such that the determinant of M is
+# factor*det(rest)*t^shift, where factor can be a Laurent polynomial.
+def unit_reduce(M: List[List[IntPoly]], nvars: int
+        ) -> Tuple[IntPoly, Tuple[int, ...], List[List[IntPoly]]]:
+    n = len(M)
+    rows = [{j: M[i][j] for j in range(n) if M[i][j]} for i in range(n)]
+    cols = [set() for j in range(n)]
+    for i in range(n):
+        for j in rows[i]:
+            cols[j].add(i)
+
+    zero = IntPoly.constant(0, nvars)
+    factor = IntPoly.constant(1, nvars)
+    row_order = []
+    col_order = []
+    active = set(range(n))
+
+    while(active):
+        # Pivot of least Markowitz cost that is a singleton or a unit
+        best = None
+        for i in active:
+            if(len(rows[i]) == 0):
+                return zero, (0,)*nvars, []
+            for j, f in rows[i].items():
+                cost = (len(rows[i])-1)*(len(cols[j])-1)
+                if(((cost == 0) or is_unit(f)) and
+                ((best is None) or (cost < best[0]))):
+                    best = (cost, i, j)
+            if((best is not None) and (best[0] == 0)):
+                break
+        if(best is None):
+            break
+
+        cost, r, c = best
+        pivot = rows[r][c]
+        factor = factor*pivot
+        row_order.append(r)
+        col_order.append(c)
+        active.remove(r)
+
+        if(cost != 0):
+            # Clear column c, using the inverse of the pivot
+            (a, s), = pivot.terms.items()
+            for i in cols[c] - {r}:
+                q = shift_poly(rows[i][c]*s, tuple([-x for x in a]))
+                for j, f in rows[r].items():
+                    if(j == c):
+                        continue
+                    g = rows[i].get(j, zero) - q*f
+                    if(g):
+                        rows[i][j] = g
+                        cols[j].add(i)
+                    else:
+                        rows[i].pop(j, None)
+                        cols[j].discard(i)
+
+        # Remove row r and column c
+        for j in rows[r]:
+            cols[j].discard(r)
+        for i in cols[c]:
+            del rows[i][c]
+        cols[c] = set()
+        rows[r] = {}
+
+    rest_rows = sorted(active)
+    rest_cols = sorted(set(range(n)) - set(col_order))
+    sign = perm_sign(row_order + rest_rows)*perm_sign(col_order + rest_cols)
+    rest = [[rows[i].get(j, zero) for j in rest_cols] for i in rest_rows]
+
+    # Take out the monomial content of rows, then of columns
+    shift = [0]*nvars
+    for i in range(len(rest)):
+        low = monomial_content(rest[i], nvars)
+        shift = [x+y for x, y in zip(shift, low)]
+        low = tuple([-x for x in low])
+        rest[i] = [shift_poly(f, low) for f in rest[i]]
+    for j in range(len(rest)):
+        low = monomial_content([row[j] for row in rest], nvars)
+        shift = [x+y for x, y in zip(shift, low)]
+        low = tuple([-x for x in low])
+        for row in rest:
+            row[j] = shift_poly(row[j], low)
+
+    return factor*sign, tuple(shift), rest
+
+
+# Splits a square matrix into diagonal blocks of its block-triangular form,
+# each reordered by markowitz_order. Returns the sign of the permutations
+# used and the blocks, so that the determinant is sign times the product of
+# the determinants of the blocks. Returns (0, []) for structurally
+# singular matrices.
+def sparse_blocks(M: List[List[IntPoly]]
+        ) -> Tuple[int, List[List[List[IntPoly]]]]:
+    n = len(M)
+    adj = [[j for j in range(n) if M[i][j]] for i in range(n)]
+
+    col_of_row = perfect_matching(adj)
+    if(col_of_row is None):
+        return 0, []
+    sign = perm_sign(col_of_row)
+
+    # Column k of the permuted matrix is column col_of_row[k],
+    # so its diagonal has no zeros
+    row_of_col = [0]*n
+    for i, j in enumerate(col_of_row):
+        row_of_col[j] = i
+    graph = [[row_of_col[j] for j in adj[i]] for i in range(n)]
+
+    blocks = []
+    for comp in reversed(strong_components(graph)):
+        comp.sort()
+        local = {v: k for k, v in enumerate(comp)}
+        block_adj = [[local[w] for w in graph[v] if w in local]
+            for v in comp]
+        row_order, col_order = markowitz_order(block_adj)
+        sign *= perm_sign(row_order)*perm_sign(col_order)
+        blocks.append([[M[comp[r]][col_of_row[comp[c]]] for c in col_order]
+            for r in row_order])
+
+    return sign, blocks
+
+
+# Determinant of a square matrix of IntPolys through unit_reduce and the
+# block-triangular form of what is left. det(block, nvars) is the
+# determinant algorithm used on each block, and mapper can be replaced by a
+# parallel map (for example Pool.map) to run the blocks at the same time.
+def block_det(M: List[List[IntPoly]], nvars: int,
+        det: Callable = bareiss, mapper: Callable = map) -> IntPoly:
+    factor, shift, M = unit_reduce(M, nvars)
+    if(factor.is_zero() or (len(M) == 0)):
+        return shift_poly(factor, shift)
+
+    sign, blocks = sparse_blocks(M)
+    if(sign == 0):
+        return IntPoly.constant(0, nvars)
+
+    result = factor*sign
+    for d in mapper(partial(det, nvars=nvars), blocks):
+        result = result*d
+    return shift_poly(result, shift)
@@ -0,0 +1,37 @@
+import os
+import sys
+
+# The modules of py_knots import each other by their bare names
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "py_knots"))
+
+import random
+import pytest
+from int_poly import IntPoly
+
+
+# Random square matrix of IntPolys with the given density of non-zero
+# entries, degree at most deg in each variable and coefficients of
+# absolute value at most coeff
+def random_poly_matrix(rng: random.Random, n: int, nvars: int,
+        deg: int = 2, coeff: int = 3, density: float = 0.6):
+    rows = []
+    for i in range(n):
+        row = []
+        for j in range(n):
+            terms = {}
+            if(rng.random() < density):
+                for k in range(rng.randint(1, 3)):
+                    exp = tuple(rng.randint(0, deg) for v in range(nvars))
+                    terms[exp] = terms.get(exp, 0) + \
+                        rng.choice([-1, 1])*rng.randint(1, coeff)
+            row.append(IntPoly({e: c for e, c in terms.items() if c != 0},
+                nvars))
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def poly_matrices():
+    rng = random.Random(0)
+    return [random_poly_matrix(rng, rng.randint(0, 6), rng.randint(1, 3))
+        for k in range(40)]
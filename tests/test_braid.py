@@ -0,0 +1,22 @@
+import numpy as np
+from braid import *
+
+
+def test_braid_word_hash_and_equality():
+    word = BraidWord([1, -2, 3])
+    assert word == [1, -2, 3]
+    assert word != (1, -2, 3)
+    assert -word == [-1, 2, -3]
+    assert -(-word) == word
+
+    wide = BraidWord(np.array([1, -2, 3], dtype=np.int32))
+    assert wide == word
+    assert hash(wide) == hash(word)
+    assert len({word, wide, BraidWord([1, -2, 3], -1)}) == 2
+
+
+def test_braid_word_smallest_int8():
+    word = BraidWord(np.array([-128, 5], dtype=np.int8))
+    assert word == [-128, 5]
+    assert -word == [128, -5]
+    assert hash(-(-word)) == hash(word)
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from numpy.linalg import eigvalsh
+from inertia import *
+
+
+# Random hermitian matrix of size n
+def random_hermitian(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, n)) + 1j*rng.standard_normal((n, n))
+    return (X + X.conj().T)/2
+
+
+@pytest.mark.parametrize("n, seed", [(LDL_MIN_SIZE, 0), (1000, 2)])
+def test_bunch_kaufman_reconstructs(n, seed):
+    H = random_hermitian(n, seed)
+    factor = bunch_kaufman(H)
+    for E in factor.blocks:
+        assert np.array_equal(E, E.conj().T)
+    D = np.zeros((n, n), dtype=np.complex128)
+    k = 0
+    for E in factor.blocks:
+        D[k:k+len(E), k:k+len(E)] = E
+        k += len(E)
+    L = factor.L
+    res = np.linalg.norm(H[factor.perm][:, factor.perm] - L @ D @ L.conj().T,
+        2)
+    assert res < 1e-10
+    assert res <= n*EPS*(np.abs(H).sum(axis=0).max() + factor.growth)
+    d_max = max([np.linalg.norm(E) for E in factor.blocks])
+    assert np.isclose(factor.growth, np.linalg.norm(L)**2*d_max)
+    assert factor.growth >= np.linalg.norm(np.abs(L) @ np.abs(D) @
+        np.abs(L).T, 2)
+
+
+@pytest.mark.parametrize("n, seed", [(LDL_MIN_SIZE, 0), (1000, 2)])
+def test_ldl_inertia_matches_eigvalsh(n, seed):
+    H = random_hermitian(n, seed)
+    e = eigvalsh(H)
+    expected = int(np.count_nonzero(e > 0) - np.count_nonzero(e < 0))
+
+    sgn, nullity, cond, certain = ldl_inertia(H)
+    assert certain
+    assert (sgn, nullity) == (expected, 0)
+
+    sgn, nullity = batch_inertia(H[None])
+    assert (sgn[0], nullity[0]) == (expected, 0)
+
+
+def test_root_of_unity():
+    assert root_of_unity(1) == 0
+    assert root_of_unity(-1) == Fraction(1, 2)
+    assert root_of_unity(np.exp(2j*np.pi*3/7)) == Fraction(3, 7)
+    assert root_of_unity(np.exp(-2j*np.pi/9973)) == Fraction(9972, 9973)
+    assert root_of_unity(np.exp(2j*np.pi*3/7) + 1e-12) is None
+    assert root_of_unity(np.exp(0.7227342478134157j)) is None
+
+
+def test_mp_unit():
+    with mp.workdps(50):
+        w = mp_unit(np.exp(2j*np.pi*2/5))
+        assert abs(w - mp.expjpi(mp.mpf(4)/5)) < mp.mpf(10)**-48
+        assert mp_unit(-1) == -1
+        x = np.exp(0.7227342478134157j)
+        assert mp_unit(x) == mp.mpc(x)
+
+
+def test_integer_rank():
+    rng = np.random.default_rng(0)
+    for rank in range(5):
+        B = rng.integers(-5, 6, (6, rank))
+        C = rng.integers(-5, 6, (rank, 7))
+        A = B @ C
+        assert integer_rank(A) == np.linalg.matrix_rank(A)
+    assert integer_rank(np.zeros((3, 4), dtype=np.int64)) == 0
+
+    # Rank 2, but in doubles the first two rows round to the same one
+    big = 2**70
+    A = np.array([[big, 1, 0], [big+1, 1, 0], [2*big, 2, 0]], dtype=object)
+    assert integer_rank(A) == 2
+
+
+# Q diag(e) Q^H, in double precision and as mpmath numbers built from the
+# same Q, so that the mpmath matrix is the exact one
+def rotated_diagonal(e: List) -> Tuple[np.ndarray, Callable]:
+    n = len(e)
+    Q, _ = np.linalg.qr(random_hermitian(n, 1))
+    H = (Q*np.array([complex(x) for x in e])) @ Q.conj().T
+    H = (H + H.conj().T)/2
+    def exact_form():
+        return (to_mp(Q)*np.array([mp.mpf(x) for x in e])) @ to_mp(
+            Q.conj().T)
+    return H, exact_form
+
+
+def test_certified_inertia():
+    e = [3, -2, 1, -1, 5, -4]
+    H, exact_form = rotated_diagonal(e)
+    assert certified_inertia(H, 1e-14, exact_form) == (0, 0, True)
+
+    # Eigenvalues far below the double rounding errors, and an exact zero
+    H, exact_form = rotated_diagonal(e + ["1e-20", "-1e-22", "1e-24"])
+    assert certified_inertia(H, 1e-14, exact_form) == (1, 0, True)
+    assert certified_inertia(H, 1e-14, None) == (0, 3, False)
+    H, exact_form = rotated_diagonal(e + ["1e-20", 0])
+    assert certified_inertia(H, 1e-14, exact_form) == (1, 1, False)
+    assert certified_inertia(H, 1e-14, exact_form, 1) == (1, 1, True)
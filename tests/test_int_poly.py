@@ -0,0 +1,66 @@
+import pytest
+from int_poly import *
+
+
+# Every coefficient the packing can hold, at both ends of the range, next
+# to each other so that the borrows between digits are exercised
+@pytest.mark.parametrize("bound", [1, 63, 64, 127, 128, 2**15-1, 2**15])
+def test_kronecker_packing_width_boundary(bound):
+    packing = KroneckerPacking.for_bounds([2, 1], bound)
+    assert bound < 2**(8*packing.width-1)
+    for a, b in [(bound, -bound), (-bound, bound), (-bound, -bound),
+            (bound, 1), (-1, bound)]:
+        f = IntPoly({(0, 0): a, (1, 0): b, (2, 0): -a, (0, 1): b,
+            (2, 1): a}, 2)
+        assert packing.unpack(packing.pack(f)) == f
+    assert packing.unpack(0) == IntPoly.constant(0, 2)
+
+
+# One byte holds the balanced digits -128, ..., 127
+def test_kronecker_packing_full_byte():
+    packing = KroneckerPacking([2], 1)
+    for coeffs in [(127, -128, 127), (-128, -128, -128), (127, 127, 127),
+            (-1, 0, 127)]:
+        f = IntPoly({(k,): c for k, c in enumerate(coeffs) if c != 0}, 1)
+        assert packing.unpack(packing.pack(f)) == f
+
+
+# Packing is a ring homomorphism while the product stays in range
+def test_kronecker_packing_multiplies():
+    f = IntPoly({(0,): -3, (1,): 2}, 1)
+    g = IntPoly({(0,): 5, (2,): -1}, 1)
+    packing = KroneckerPacking.for_bounds([3], 30)
+    assert packing.unpack(packing.pack(f)*packing.pack(g)) == f*g
+
+
+def test_kronecker_bareiss_matches_bareiss(poly_matrices):
+    for M in poly_matrices:
+        nvars = M[0][0].nvars if M else 1
+        assert kronecker_bareiss(M, nvars) == bareiss(M, nvars)
+
+
+def test_laurent_poly_exponents():
+    t = LaurentPoly.monomial(0, 1, 2)
+    s = LaurentPoly.monomial(1, 1, 2)
+    one = LaurentPoly.constant(1, 2)
+    f = (t*t - one)*LaurentPoly.monomial(1, -3, 2) + s
+    assert f.min_exps() == (0, -3)
+    assert f.strip() == LaurentPoly({(2, 0): 1, (0, 0): -1, (0, 4): 1}, 2)
+    assert f.shift((1, 3)).shift((-1, -3)) == f
+    assert f.scale_exps(-2) == LaurentPoly({(-4, 6): 1, (0, 6): -1,
+        (0, -2): 1}, 2)
+    assert f.halve_even_exps() == LaurentPoly({(1, -3): 1, (0, -3): -1,
+        (0, 1): 1}, 2)
+
+
+def test_laurent_poly_division():
+    t = LaurentPoly.monomial(0, 1, 1)
+    one = LaurentPoly.constant(1, 1)
+    f = (t - one)*(t - one)*(t + one)*LaurentPoly.monomial(0, -5, 1)
+    assert f.exact_div(t - one) == (t - one)*(t + one)*\
+        LaurentPoly.monomial(0, -5, 1)
+    assert f.divide_out(t - one, 5) == ((t + one)*\
+        LaurentPoly.monomial(0, -5, 1), 2)
+    assert f.divide_out(t + one, 1)[1] == 1
+    with pytest.raises(ArithmeticError):
+        f.exact_div(t + one + one)
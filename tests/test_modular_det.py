@@ -0,0 +1,41 @@
+import numpy as np
+from int_poly import *
+from modular_det import *
+
+
+def test_interpolate_mod():
+    p = choose_primes(1)[0]
+    coeffs = np.array([5, p-3, 0, 7], dtype=np.int64)
+    x = np.arange(len(coeffs))
+    values = np.array([sum(int(c)*int(t)**k for k, c in enumerate(coeffs))
+        % p for t in x], dtype=np.int64)
+    assert np.array_equal(interpolate_mod(values, p), coeffs)
+
+
+def test_batch_det_mod():
+    p = choose_primes(1)[0]
+    rng = np.random.default_rng(0)
+    A = rng.integers(-5, 6, size=(20, 4, 4))
+    A[0, :, 0] = 0
+    A[1, 2] = A[1, 0]
+    expected = [round(np.linalg.det(a)) % p for a in A]
+    assert batch_det_mod(A, p).tolist() == expected
+
+
+def test_modular_det_matches_bareiss(poly_matrices):
+    for k, M in enumerate(poly_matrices):
+        nvars = M[0][0].nvars if M else 1
+        assert modular_det(M, nvars) == bareiss(M, nvars)
+        if(k < 10):
+            assert modular_det(M, nvars, chunk=64) == bareiss(M, nvars)
+
+
+# Coefficients far above one prime, so that several primes and the
+# Chinese remainder theorem are needed, with both signs
+def test_modular_det_several_primes():
+    c = 3**40
+    M = [[IntPoly({(1,): c, (0,): 1}, 1), IntPoly({(0,): -c}, 1)],
+        [IntPoly({(0,): c}, 1), IntPoly({(2,): c, (0,): -7}, 1)]]
+    assert len(choose_primes(2*det_bounds(M, 1)[1])) > 2
+    assert modular_det(M, 1) == bareiss(M, 1)
+    assert modular_det([[-M[1][1]]], 1) == -M[1][1]
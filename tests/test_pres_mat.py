@@ -0,0 +1,127 @@
+import pytest
+import numpy as np
+from braid import *
+from pres_mat import *
+
+
+# Presentation matrix of a two-colored closed braid
+def two_color_matrix() -> PolyMatrix:
+    p = ColBraid(Braid([1, 3, 3, 2, -1, 2], 4).braid, 4, [0, 1])
+    return presentation_matrix(p.make_graph_complete([1, 1]))
+
+
+def test_signature_matches_grid():
+    pm = two_color_matrix()
+    omegas = torus_grid(2, 5)
+    sgn, nullity = pm.signature_grid(omegas)
+    for index in np.ndindex(sgn.shape):
+        assert pm.signature(omegas[index]) == (sgn[index], nullity[index])
+
+
+def test_presentation_matrix_is_lazy():
+    pm = two_color_matrix()
+    assert "M" not in pm.__dict__
+    text = pm.describe()
+    assert text.startswith("Presentation Matrix\n" + str(pm.M))
+    assert text.count("Matrix([") == 1 + 2**2
+
+
+def test_det_cache_is_bounded(monkeypatch):
+    import pres_mat
+    monkeypatch.setattr(pres_mat, "DET_CACHE", OrderedDict())
+    monkeypatch.setattr(pres_mat, "DET_CACHE_SIZE", 2)
+    pm = two_color_matrix()
+    det = pm.determinant
+    for k in range(1, 4):
+        assert PolyMatrix(pm.variables, k*pm.tensor, pm.exps).determinant
+    assert len(pres_mat.DET_CACHE) == 2
+    assert pm.cache_key not in pres_mat.DET_CACHE
+    assert PolyMatrix(pm.variables, pm.tensor, pm.exps).determinant == det
+
+
+def test_det_backends_match_bareiss(poly_matrices, monkeypatch):
+    import pres_mat
+    for name, det in DET_BACKENDS.items():
+        for M in poly_matrices:
+            nvars = M[0][0].nvars if M else 1
+            assert det(M, nvars) == bareiss(M, nvars), name
+
+    # Through PolyMatrix, with the cache out of the way
+    pm = two_color_matrix()
+    expected = bareiss(pm.entries, 2)
+    for name in DET_BACKENDS:
+        monkeypatch.setattr(pres_mat, "DET_CACHE", OrderedDict())
+        assert PolyMatrix(pm.variables, pm.tensor, pm.exps,
+            name).determinant == expected, name
+
+
+# Conway potential functions and multivariable Alexander polynomials of
+# small closed braids, in the conventions of conway_fraction: the trefoil,
+# the figure eight knot, the Hopf link, and the (2, 4) torus link
+@pytest.mark.parametrize("word, strands, cols, cpf, alexander", [
+    ([1, 1, 1], 2, [0], "(t0**4 - t0**2 + 1)/t0**2", "t0**2 - t0 + 1"),
+    ([1, -2, 1, -2], 3, [0], "(-t0**4 + 3*t0**2 - 1)/t0**2",
+        "-t0**2 + 3*t0 - 1"),
+    ([1, 1], 2, [0, 1], "-1", "-1"),
+    ([1, 1, 1, 1], 2, [0, 1], "(t0**2*t1**2 + 1)/(t0*t1)", "t0*t1 + 1")])
+def test_conway_known_values(word, strands, cols, cpf, alexander):
+    p = ColBraid(word, strands, cols)
+    graph = p.make_graph_complete([1]*len(cols))
+    pm = presentation_matrix(graph)
+    assert simplify(pm.conway_potential_function(graph)
+        - sympify(cpf)) == 0
+    assert expand(pm.multivar_alexander_poly(graph)
+        - sympify(alexander)) == 0
+
+
+# The signature function against dense sampling of the circle away from
+# omega = 1: the (3, 4) and (2, 7) torus knots, trefoil # trefoil, whose
+# Alexander polynomial has double roots, and a knot with 5 crossings
+@pytest.mark.parametrize("word, strands", [([1, 2]*4, 3), ([1]*7, 2),
+    ([1, 1, 1, 2, 3, 3, 3], 4), ([1, 1, 1, 2, -1, 2], 3)])
+def test_signature_function_matches_sampling(word, strands):
+    pm = presentation_matrix(ColBraid(word, strands, [0]).make_graph_complete(
+        [1]))
+    sf = pm.signature_function()
+    thetas = np.linspace(0.05, 2*np.pi-0.05, 2000)
+    thetas = thetas[np.abs(thetas[:, None] - np.array(sf.jumps + [-1])
+        ).min(axis=1) > 1e-3]
+    sgn, nullity = pm.signature_grid(np.exp(1j*thetas)[:, None])
+    assert [sf(theta) for theta in thetas] == sgn.tolist()
+    assert not nullity.any()
+
+    roots = dict(unit_circle_roots({exp[0]: c for exp, c in
+        pm.determinant.terms.items()}))
+    for k, theta in enumerate(sf.jumps):
+        assert sf.jump_certified[k] == (roots[theta] == 1)
+        assert 1 <= sf.nullity(theta) <= roots[theta]
+        assert (sf(theta), sf.nullity(theta)) == pm.signature(
+            [np.exp(1j*theta)])
+
+
+# The 5_2 knot, whose Alexander polynomial 2t^2 - 3t + 2 has roots on the
+# unit circle that are not roots of unity
+def test_certified_signature_at_root():
+    pm = presentation_matrix(ColBraid([1, 1, 1, 2, -1, 2], 3, [0]
+        ).make_graph_complete([1]))
+    omega = [np.exp(1j*pm.signature_function().jumps[0])]
+    assert pm.certified_signature(omega) == (-1, 1, False)
+    assert pm.certified_signature(omega, nullity=1) == (-1, 1, True)
+
+    # Off the root by much more than the rounding errors
+    omega = [np.exp(1j*(pm.signature_function().jumps[0] + 1e-3))]
+    assert pm.certified_signature(omega) == (-2, 0, True)
+
+
+# The split link of a trefoil and its mirror image, in one and in two
+# colors, is singular at (-1, ..., -1)
+@pytest.mark.parametrize("colors", [1, 2])
+def test_certified_signature_at_minus_one(colors):
+    p = ColBraid([1, 1, 1, -3, -3, -3], 4, [0, colors-1])
+    pm = presentation_matrix(p.make_graph_complete([1]*colors))
+    assert pm.determinant.is_zero()
+    assert pm.certified_signature([-1]*colors) == (0, 1, True)
+
+    pm = two_color_matrix()
+    assert pm.certified_signature([-1, -1]) == pm.signature([-1, -1]) + (
+        True,)
@@ -0,0 +1,142 @@
+import random
+from copy import deepcopy
+from braid import *
+from sgraph import *
+
+
+# Random colored braids, with canceling words w w^(-1) inserted so that
+# the graphs have redundant pairs of edges to delete
+def braid_corpus(count: int, seed: int = 0) -> List[ColBraid]:
+    rng = random.Random(seed)
+    corpus = []
+    while(len(corpus) < count):
+        strands = rng.randint(2, 5)
+        letters = list(range(1, strands)) + list(range(-strands+1, 0))
+        word = [rng.choice(letters) for i in range(rng.randint(1, 12))]
+        for i in range(rng.randint(0, 3)):
+            w = [rng.choice(letters) for j in range(rng.randint(1, 4))]
+            k = rng.randint(0, len(word))
+            word[k:k] = w + [-x for x in reversed(w)]
+
+        knots = Braid(word, strands).ct_knots
+        colors = rng.randint(1, knots)
+        col_list = list(range(colors)) + \
+            [rng.randrange(colors) for i in range(knots-colors)]
+        rng.shuffle(col_list)
+        corpus.append(ColBraid(word, strands, col_list))
+    return corpus
+
+
+# The graph of a braid with its clasps and half-twists, before cleaning
+def raw_graph(p: ColBraid) -> SGraph:
+    graph = p.init_graph([1]*(max(p.col_list)+1))
+    return p.add_clasps_hts(graph)
+
+
+# Cleans the graph by calling delete_redundant_pair until it finds nothing
+def clean_by_loop(graph: SGraph) -> SGraph:
+    while(graph.delete_redundant_pair()):
+        pass
+    return graph
+
+
+def graph_data(graph: SGraph) -> Tuple:
+    return ([edge.eid for edge in graph.edges],
+        {pair: [edge.eid for edge in edges]
+            for pair, edges in graph.vve.items()},
+        {v: [edge.eid for edge in edges] for v, edges in graph.ve.items()})
+
+
+def test_clean_graph_matches_delete_redundant_pair():
+    deleted = 0
+    for p in braid_corpus(200):
+        graph = raw_graph(p)
+        expected = clean_by_loop(deepcopy(graph))
+        size = len(graph.edges)
+        graph.clean_graph()
+        deleted += size - len(graph.edges)
+        assert graph_data(graph) == graph_data(expected)
+
+        for g in [graph, expected]:
+            g.colors_connected()
+            g.make_complete()
+        assert graph_data(graph) == graph_data(expected)
+        assert graph.hom_basis == expected.hom_basis
+    assert deleted > 0
+
+
+def test_array_clean_graph_matches_delete_redundant_pair():
+    for p in braid_corpus(100, seed=1):
+        cols = [1]*(max(p.col_list)+1)
+        expected = clean_by_loop(raw_graph(p))
+        array_graph = p.add_clasps_hts(p.init_array_graph(cols))
+        array_graph.clean_graph()
+        graph = array_graph.to_sgraph()
+        assert [(e.initial, e.terminal, e.typ) for e in graph.edges] == \
+            [(e.initial, e.terminal, e.typ) for e in expected.edges]
+
+
+def test_symmetric_gen_seifert_matrices():
+    rng = random.Random(2)
+    graphs = 0
+    for p in braid_corpus(60, seed=2):
+        colors = max(p.col_list)+1
+        if(colors < 2):
+            continue
+        graph = p.make_graph_complete([rng.choice([1, -1])
+            for i in range(colors)])
+        graphs += 1
+
+        gen_seifs = graph.gen_seifert_matrices(symmetric=True)
+        assert np.array_equal(gen_seifs,
+            graph.gen_seifert_matrices(symmetric=False))
+
+        basis = graph.hom_basis
+        for lift, gen_seif in zip(lift_tuples(colors), gen_seifs):
+            assert gen_seif.tolist() == graph.gen_seifert_matrix(lift)
+            assert gen_seif.tolist() == [[graph.linking_number(l1, l2, lift)
+                for l2 in basis] for l1 in basis]
+    assert graphs >= 10
+
+
+def test_array_graph_matches_sgraph():
+    for p in braid_corpus(60, seed=3):
+        cols = [1]*(max(p.col_list)+1)
+        for make in [ColBraid.make_graph, ColBraid.make_graph_complete]:
+            expected = make(p, cols)
+            graph = make(p, cols, array=True)
+            assert graph.edges == expected.edges
+            assert graph_data(graph) == graph_data(expected)
+            for key in ["edge_nums", "edge_cols"]:
+                for a, b in zip(getattr(graph, key), getattr(expected, key)):
+                    assert np.array_equal(a, b)
+            assert np.array_equal(graph.edge_typs, expected.edge_typs)
+            assert np.array_equal(graph.gen_seifert_matrices(),
+                expected.gen_seifert_matrices())
+
+
+def test_gen_seifert_matrices_in_blocks():
+    for p in braid_corpus(30, seed=4):
+        graph = p.make_graph_complete([1]*(max(p.col_list)+1))
+        expected = graph.gen_seifert_matrices()
+        for chunk in [1, 7, 50]:
+            assert np.array_equal(graph.gen_seifert_matrices(chunk=chunk),
+                expected)
+            assert np.array_equal(graph.gen_seifert_matrices(
+                symmetric=False, chunk=chunk), expected)
+
+
+def test_sparse_seifert_matrix_matches_dense():
+    for p in braid_corpus(40, seed=5):
+        colors = max(p.col_list)+1
+        graph = p.make_graph_complete([1]*colors)
+        n = len(graph.hom_basis)
+        for lift in lift_tuples(colors):
+            for chunk in [1, 5, 64]:
+                rows, cols, data = graph.sparse_seifert_matrix(lift, chunk)
+                assert np.all(data != 0)
+                assert len(set(zip(rows.tolist(), cols.tolist()))) == \
+                    len(rows)
+                gen_seif = np.zeros((n, n), dtype=np.int64)
+                gen_seif[rows, cols] = data
+                assert gen_seif.tolist() == graph.gen_seifert_matrix(lift)
@@ -0,0 +1,50 @@
+import random
+from conftest import random_poly_matrix
+from int_poly import *
+from sparse_det import *
+
+
+# Matrices with many unit entries, so that unit_reduce has work to do
+def unit_matrices(count: int):
+    rng = random.Random(1)
+    return [random_poly_matrix(rng, rng.randint(1, 7), rng.randint(1, 2),
+        coeff=1, density=rng.choice([0.3, 0.6])) for k in range(count)]
+
+
+def test_unit_reduce_keeps_determinant(poly_matrices):
+    for M in poly_matrices + unit_matrices(60):
+        nvars = M[0][0].nvars if M else 1
+        factor, shift, rest = unit_reduce(M, nvars)
+        assert shift_poly(factor*bareiss(rest, nvars), shift) == \
+            bareiss(M, nvars)
+
+
+def test_unit_reduce_zero_row():
+    one = IntPoly.constant(1, 1)
+    t = IntPoly({(1,): 1}, 1)
+    zero = IntPoly.constant(0, 1)
+    M = [[one, t, t], [zero, zero, zero], [t, one, one+t]]
+    factor, shift, rest = unit_reduce(M, 1)
+    assert factor.is_zero() and (rest == [])
+    assert block_det(M, 1).is_zero()
+
+
+# Rows 1, 2 and 3 vanish in columns 0 and 1, so there is no perfect matching
+# although no row or column is zero
+def test_structurally_singular():
+    two = IntPoly.constant(2, 1)
+    f = IntPoly({(0,): 2, (1,): 3}, 1)
+    zero = IntPoly.constant(0, 1)
+    M = [[two, f, f, two], [zero, zero, f, two], [zero, zero, two, f],
+        [zero, zero, f, f+two]]
+    sign, blocks = sparse_blocks(M)
+    assert (sign, blocks) == (0, [])
+    assert bareiss(M, 1).is_zero()
+    assert block_det(M, 1).is_zero()
+
+
+def test_block_det_matches_bareiss(poly_matrices):
+    for M in poly_matrices + unit_matrices(60):
+        nvars = M[0][0].nvars if M else 1
+        assert block_det(M, nvars) == bareiss(M, nvars)
+        assert block_det(M, nvars, kronecker_bareiss) == bareiss(M, nvars)